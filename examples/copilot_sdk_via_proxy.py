@@ -21,6 +21,21 @@ import os
 import shutil
 import sys
 
+try:
+    import uvloop  # 可選：用 libuv 事件迴圈降低每則串流訊息的開銷
+except ImportError:
+    uvloop = None
+
+# 根據後端選擇模型
+# - claude-code-acp: 透過 ACP set_session_model 方法 (opus/sonnet)
+# - Gemini: 透過 CLI --model 參數 (gemini-2.0-flash, gemini-2.5-flash 等)
+# - Copilot: 透過 CLI --model 參數 (gpt-4, gpt-4o 等)
+MODEL_MAP = {
+    "gemini": "gemini-2.0-flash",
+    "claude-code-acp": "sonnet",
+    "copilot": "gpt-4o",
+}
+
 async def main():
     # 檢查依賴
     try:
@@ -54,82 +69,143 @@ async def main():
     await client.start()
     print("    ✅ 成功")
 
-    # 根據後端選擇模型
-    # - claude-code-acp: 透過 ACP set_session_model 方法 (opus/sonnet)
-    # - Gemini: 透過 CLI --model 參數 (gemini-2.0-flash, gemini-2.5-flash 等)
-    # - Copilot: 透過 CLI --model 參數 (gpt-4, gpt-4o 等)
-    model_map = {
-        "gemini": "gemini-2.0-flash",
-        "claude-code-acp": "sonnet",
-        "copilot": "gpt-4o",
-    }
-    model = model_map.get(backend, "default")
+    model = MODEL_MAP.get(backend, "default")
 
     print(f"\n[2] 建立 Session (model: {model})...")
     session = await client.create_session({"model": model})
     print("    ✅ 成功")
 
     # 設定事件處理
+    loop = asyncio.get_running_loop()  # 只查一次，on_event 是熱路徑
     response_text = []
+    seen_full = set()  # 已輸出的完整訊息雜湊，避免對 response_text 做 O(n) 掃描
     done = asyncio.Event()
 
-    def on_event(event):
+    # 串流輸出緩衝：把小段 delta 合併後再寫 stdout，
+    # 避免每個 token 都觸發一次 flush 系統呼叫
+    out_buf = []
+    flush_state = {"last": 0.0, "handle": None}
+
+    def flush_output():
+        if flush_state["handle"] is not None:
+            flush_state["handle"].cancel()
+            flush_state["handle"] = None
+        if out_buf:
+            sys.stdout.write("".join(out_buf))
+            sys.stdout.flush()
+            out_buf.clear()
+        flush_state["last"] = loop.time()
+
+    # 事件結構在同一個 session 內是固定的：第一個 delta 探測一次取值方式後快取，
+    # 之後每個 token 事件只要一次屬性存取，不再重複 hasattr
+    delta_getter = None
+
+    def on_message(event):
+        flush_output()  # 先送出緩衝中的 delta，維持輸出順序
+        content = event.data.content if hasattr(event.data, 'content') else str(event.data)
+        if content and hash(content) not in seen_full:
+            seen_full.add(hash(content))
+            response_text.append(content)
+            print(content, end="", flush=True)
+
+    def on_delta(event):
+        nonlocal delta_getter
+        # 嘗試多種方式取得 delta 內容（只探測一次）
+        if delta_getter is None:
+            data = event.data
+            if hasattr(data, 'deltaContent'):
+                delta_getter = lambda d: d.deltaContent
+            elif hasattr(data, 'delta_content'):
+                delta_getter = lambda d: d.delta_content
+            elif isinstance(data, dict):
+                delta_getter = lambda d: d.get('deltaContent') or d.get('delta_content')
+            else:
+                delta_getter = lambda d: None
+        delta = delta_getter(event.data)
+
+        if delta:
+            response_text.append(delta)
+            out_buf.append(delta)
+            if "\n" in delta or loop.time() - flush_state["last"] > 0.03:
+                flush_output()
+            elif flush_state["handle"] is None:
+                # 保險機制：緩衝非空時最晚 50ms 後也要 flush
+                flush_state["handle"] = loop.call_later(0.05, flush_output)
+
+    def on_tool_start(event):
+        flush_output()
+        tool = event.data.toolName if hasattr(event.data, 'toolName') else "unknown"
+        print(f"\n    🔧 Tool: {tool}")
+
+    def on_idle(event):
+        flush_output()
+        # 延遲一下讓最後的 message 事件有機會處理
+        loop.call_later(0.5, done.set)
+
+    # 用 dict 分派取代逐一字串比較：每個事件只要一次雜湊查找
+    handlers = {
+        "assistant.message": on_message,
+        "assistant.message_delta": on_delta,
+        "tool.execution_start": on_tool_start,
+        "session.idle": on_idle,
+    }
+
+    # DEBUG 旗標只在設定時讀一次，熱路徑不必每個事件查 os.environ
+    debug = bool(os.environ.get("DEBUG"))
+
+    def on_event_fast(event):
+        event_type = event.type.value if hasattr(event.type, 'value') else str(event.type)
+        handler = handlers.get(event_type)
+        if handler:
+            handler(event)
+
+    def on_event_debug(event):
         event_type = event.type.value if hasattr(event.type, 'value') else str(event.type)
 
         # Debug: 顯示所有事件類型和資料
-        if os.environ.get("DEBUG"):
-            print(f"\n    [DEBUG] Event: {event_type}", file=sys.stderr)
-            if event_type == "assistant.message_delta":
-                print(f"    [DEBUG] Data: {event.data}", file=sys.stderr)
-
-        if event_type == "assistant.message":
-            content = event.data.content if hasattr(event.data, 'content') else str(event.data)
-            if content and content not in response_text:
-                response_text.append(content)
-                print(content, end="", flush=True)
-        elif event_type == "assistant.message_delta":
-            # 嘗試多種方式取得 delta 內容
-            delta = None
-            if hasattr(event.data, 'deltaContent'):
-                delta = event.data.deltaContent
-            elif hasattr(event.data, 'delta_content'):
-                delta = event.data.delta_content
-            elif isinstance(event.data, dict):
-                delta = event.data.get('deltaContent') or event.data.get('delta_content')
-
-            if delta:
-                print(delta, end="", flush=True)
-                response_text.append(delta)
-        elif event_type == "tool.execution_start":
-            tool = event.data.toolName if hasattr(event.data, 'toolName') else "unknown"
-            print(f"\n    🔧 Tool: {tool}")
-        elif event_type == "session.idle":
-            # 延遲一下讓最後的 message 事件有機會處理
-            asyncio.get_event_loop().call_later(0.5, done.set)
-
-    session.on(on_event)
+        print(f"\n    [DEBUG] Event: {event_type}", file=sys.stderr)
+        if event_type == "assistant.message_delta":
+            print(f"    [DEBUG] Data: {event.data}", file=sys.stderr)
+
+        handler = handlers.get(event_type)
+        if handler:
+            handler(event)
+
+    session.on(on_event_debug if debug else on_event_fast)
 
     # 互動迴圈
     print("\n[3] 開始對話 (輸入 'quit' 結束)")
     print("-" * 50)
 
+    # 逾時用同一個 done 事件搭配 call_later 旗標，
+    # 不必每回合讓 wait_for 多包一層 Task
+    timed_out = [False]
+
+    def on_timeout():
+        timed_out[0] = True
+        done.set()
+
     while True:
         try:
-            prompt = input("\n你: ").strip()
+            # 用執行緒讀 stdin，事件迴圈在等待輸入時仍可處理背景事件
+            prompt = (await asyncio.to_thread(input, "\n你: ")).strip()
             if not prompt:
                 continue
             if prompt.lower() in ('quit', 'exit', 'q'):
                 break
 
             response_text.clear()
+            seen_full.clear()
             done.clear()
 
             print("\nAI: ", end="", flush=True)
             await session.send({"prompt": prompt})
 
-            try:
-                await asyncio.wait_for(done.wait(), timeout=120.0)
-            except asyncio.TimeoutError:
+            timed_out[0] = False
+            timeout_handle = loop.call_later(120.0, on_timeout)
+            await done.wait()
+            timeout_handle.cancel()
+            if timed_out[0]:
                 print("\n    ⚠️ 回應超時")
 
             # 如果沒有 streaming，顯示完整回應
@@ -149,4 +225,6 @@ async def main():
     print("    ✅ 完成")
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.install()
     asyncio.run(main())
@@ -7,9 +7,10 @@ allowing Claude Code to work with any ACP-compatible client like Zed, Neovim, et
 
 import asyncio
 
-from .agent import ClaudeAcpAgent
-from .client import ClaudeClient, ClaudeEvents
-from .acp_client import AcpClient, AcpClientEvents
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 __version__ = "0.4.4"
 
@@ -19,15 +20,42 @@ __all__ = [
     "ClaudeEvents",
     "AcpClient",
     "AcpClientEvents",
+    "AcpClientPool",
     "main",
     "run",
 ]
 
+# Lazy re-exports (PEP 562): the CLI entry point only needs ClaudeAcpAgent,
+# so the client submodules are imported on first attribute access instead of
+# at package import time, keeping cold start fast.
+_LAZY_IMPORTS = {
+    "ClaudeAcpAgent": ".agent",
+    "ClaudeClient": ".client",
+    "ClaudeEvents": ".client",
+    "AcpClient": ".acp_client",
+    "AcpClientEvents": ".acp_client",
+    "AcpClientPool": ".acp_client",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    module = importlib.import_module(module_name, __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
 
 async def run() -> None:
     """Run the Claude ACP agent."""
     from acp import run_agent
 
+    from .agent import ClaudeAcpAgent
+
     agent = ClaudeAcpAgent()
     try:
         # Enable unstable protocol to support set_session_model
@@ -38,6 +66,10 @@ async def run() -> None:
 
 def main() -> None:
     """Entry point for the claude-code-acp command."""
+    # uvloop moves the event loop into libuv/C, cutting per-message overhead
+    # on the chatty JSON-RPC stdio stream (optional, POSIX only)
+    if uvloop is not None:
+        uvloop.install()
     asyncio.run(run())
 
 
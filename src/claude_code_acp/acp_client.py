@@ -9,12 +9,26 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import os
 from dataclasses import dataclass
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any, Callable, Coroutine
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 from acp import spawn_agent_process
 from acp.client.connection import ClientSideConnection
+from acp.task.sender import MessageSender
 from acp.schema import (
     AgentMessageChunk,
     AgentThoughtChunk,
@@ -32,7 +46,107 @@ from acp.schema import (
 
 logger = logging.getLogger(__name__)
 
-__all__ = ["AcpClient", "AcpClientEvents"]
+__all__ = ["AcpClient", "AcpClientEvents", "AcpClientPool"]
+
+# Shared read-only stand-in for "no tool input/output"; avoids allocating
+# a fresh {} per tool-call event and keeps handlers from mutating it
+_EMPTY = MappingProxyType({})
+
+# Marker distinct from None (None is the dispatcher shutdown sentinel)
+_UNSET = object()
+
+# Invariant handshake identity; built once instead of per connect()
+_CLIENT_INFO = Implementation(
+    name="claude-code-acp-client",
+    version="0.2.0",
+)
+
+
+class _BatchingMessageSender(MessageSender):
+    """MessageSender that coalesces queued frames into one write.
+
+    When several outbound calls are pending (e.g. a cancel issued while a
+    prompt streams), the stock sender does a write+drain syscall pair per
+    frame. This variant drains whatever is queued and flushes the batch
+    with a single writelines+drain; with one frame pending it degenerates
+    to the stock behavior.
+    """
+
+    async def _loop(self) -> None:
+        try:
+            while True:
+                item = await self._queue.get()
+                closing = False
+                batch = []
+                while True:
+                    if item is None:
+                        closing = True
+                        break
+                    batch.append(item)
+                    if self._queue.empty():
+                        break
+                    item = self._queue.get_nowait()
+                if batch:
+                    try:
+                        self._writer.writelines([p.payload for p in batch])
+                        await self._writer.drain()
+                    except Exception as exc:
+                        for pending in batch:
+                            if not pending.future.done():
+                                pending.future.set_exception(exc)
+                        raise
+                    else:
+                        for pending in batch:
+                            if not pending.future.done():
+                                pending.future.set_result(None)
+                if closing:
+                    return
+        except asyncio.CancelledError:
+            return
+
+
+def _widen_pipe(transport: Any) -> None:
+    """Best-effort bump of a pipe transport's kernel buffer to 1 MiB.
+
+    Larger pipe capacity means fewer read/write syscalls on the chatty
+    JSON-RPC stream. Linux only; silently keeps the default when the
+    fd is unavailable or fs.pipe-max-size caps the request.
+    """
+    if fcntl is None or not hasattr(fcntl, "F_SETPIPE_SZ") or transport is None:
+        return
+    try:
+        pipe = transport.get_extra_info("pipe")
+        if pipe is not None:
+            fcntl.fcntl(pipe.fileno(), fcntl.F_SETPIPE_SZ, 1 << 20)
+    except OSError:
+        pass
+
+
+def _read_file(path: str) -> str:
+    """Read a file as UTF-8 text (called from a worker thread).
+
+    Binary read plus a single decode avoids the TextIOWrapper layer and
+    its incremental-decoder copies on large files.
+    """
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+@lru_cache(maxsize=16)
+def _permission_option_list(option_key: tuple[tuple[str, str], ...]) -> list[dict[str, str]]:
+    """Build the option list handed to on_permission handlers.
+
+    Agents reuse the same option set ("allow"/"reject"/...) for every
+    prompt, so the converted list is cached keyed by its contents.
+    """
+    return [{"id": option_id, "name": name} for option_id, name in option_key]
+
+
+def _write_file(path: str, content: str) -> None:
+    """Write UTF-8 text, creating parent dirs (called from a worker thread)."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content.encode("utf-8"))
 
 
 @dataclass
@@ -42,8 +156,11 @@ class TerminalProcess:
     process: asyncio.subprocess.Process
     command: str
     cwd: str
-    output_buffer: list[str]
+    # Raw bytes accumulated by the reader task; decoded once per drain
+    output_buffer: bytearray
     exit_code: int | None = None
+    # Background task continuously draining stdout into output_buffer
+    reader_task: asyncio.Task | None = None
 
 
 @dataclass
@@ -72,6 +189,12 @@ class AcpClient:
     This client spawns an ACP agent as a subprocess and communicates
     via the Agent Client Protocol (JSON-RPC over stdio).
 
+    The stream between client and agent is many small JSON-RPC messages,
+    so per-read event-loop overhead dominates. Running the caller under
+    uvloop (``uvloop.install()`` before ``asyncio.run``, or the package's
+    ``uvloop`` extra) moves the pipe transports into libuv/C and is the
+    recommended setup for high-rate streaming.
+
     Example:
         ```python
         # Connect to claude-code-acp
@@ -96,6 +219,7 @@ class AcpClient:
         cwd: str = ".",
         env: dict[str, str] | None = None,
         mcp_servers: list[dict] | None = None,
+        event_pool_size: int = 1,
     ):
         """
         Initialize the ACP client.
@@ -107,6 +231,9 @@ class AcpClient:
             env: Additional environment variables.
             mcp_servers: List of MCP server configurations.
                 Each dict should have: name, command, args (list), env (optional dict).
+            event_pool_size: Number of dispatcher tasks draining session updates.
+                The default of 1 preserves event ordering; higher values let
+                slow handlers overlap at the cost of ordering guarantees.
         """
         self.command = command
         self.args = args or []
@@ -115,16 +242,27 @@ class AcpClient:
         self.mcp_servers = mcp_servers or []
         self.events = AcpClientEvents()
 
+        # Convert MCP server configs to ACP schema once; new_session
+        # reuses the list instead of re-validating unchanged config
+        self._mcp_servers_acp = self._build_mcp_servers()
+
         self._process: asyncio.subprocess.Process | None = None
         self._connection: ClientSideConnection | None = None
         self._session_id: str | None = None
-        self._text_buffer = ""
+        # Streamed text chunks; joined once when prompt() returns
+        self._text_chunks: list[str] = []
         self._initialized = False
         # Model to set after session is created
         self._pending_model: str | None = None
         # Terminal management
         self._terminals: dict[str, TerminalProcess] = {}
         self._terminal_counter = 0
+        # Session updates are queued here and drained by dispatcher tasks so
+        # the agent's JSON-RPC stream is never blocked on user callbacks.
+        # The bound applies backpressure only when handlers fall far behind.
+        self._event_pool_size = event_pool_size
+        self._event_queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+        self._dispatch_tasks: list[asyncio.Task] = []
 
     # --- Event decorators ---
 
@@ -224,7 +362,9 @@ class AcpClient:
         if self._process is not None:
             return
 
-        # Spawn the agent process
+        # Spawn the agent process. A 1 MiB stream limit lets large JSON-RPC
+        # frames (big tool outputs, file reads) land in one buffer pass
+        # instead of repeated 64 KiB reader refills.
         self._process = await asyncio.create_subprocess_exec(
             self.command,
             *self.args,
@@ -233,39 +373,114 @@ class AcpClient:
             stderr=asyncio.subprocess.PIPE,
             cwd=self.cwd,
             env=self.env,
+            limit=1 << 20,
         )
 
         if self._process.stdin is None or self._process.stdout is None:
             raise RuntimeError("Failed to create subprocess pipes")
 
+        # Match the kernel pipe capacity to the 1 MiB stream limit so
+        # bursty frames move in fewer syscalls (best effort, Linux only)
+        _widen_pipe(self._process.stdin.transport)
+        stdout_transport = getattr(self._process, "_transport", None)
+        if stdout_transport is not None:
+            # StreamReader exposes no public transport; reach through the
+            # process transport and tolerate any asyncio-internal change
+            try:
+                _widen_pipe(stdout_transport.get_pipe_transport(1))
+            except Exception:
+                pass
+
         # Create ACP connection
         # Note: ClientSideConnection expects (writer, reader) - stdin is writer, stdout is reader
         self._connection = ClientSideConnection(
             to_client=self._create_client_handler(),
             input_stream=self._process.stdin,
             output_stream=self._process.stdout,
+            sender_factory=_BatchingMessageSender,
         )
 
         # Initialize the connection
         init_response = await self._connection.initialize(
             protocol_version=1,
-            client_info=Implementation(
-                name="claude-code-acp-client",
-                version="0.2.0",
-            ),
+            client_info=_CLIENT_INFO,
         )
         logger.info(f"Connected to agent: {init_response.agent_info}")
         self._initialized = True
 
+        # Start dispatcher tasks that drain queued session updates
+        self._dispatch_tasks = [
+            asyncio.create_task(self._dispatch_events())
+            for _ in range(self._event_pool_size)
+        ]
+
+    async def _dispatch_events(self) -> None:
+        """Drain the session-update queue and invoke the update handler."""
+        # Hoist attribute lookups out of the per-update loop; this path
+        # runs once per streamed chunk
+        queue = self._event_queue
+        get = queue.get
+        get_nowait = queue.get_nowait
+        empty = queue.empty
+        task_done = queue.task_done
+        handle = self._handle_session_update
+        carried: Any = _UNSET
+        while True:
+            if carried is not _UNSET:
+                item, carried = carried, _UNSET
+            else:
+                item = await get()
+            if item is None:
+                task_done()
+                break
+            session_id, update = item
+            if type(update) is AgentMessageChunk:
+                # Coalesce a queued run of message chunks into one
+                # handler call; when emission outpaces a slow on_text
+                # handler this amortizes per-call overhead
+                updates = [update]
+                while not empty() and len(updates) < 16:
+                    nxt = get_nowait()
+                    if nxt is not None and type(nxt[1]) is AgentMessageChunk:
+                        updates.append(nxt[1])
+                    else:
+                        carried = nxt
+                        break
+                try:
+                    await self._handle_message_batch(updates)
+                except Exception as e:
+                    logger.error(f"Error dispatching session update: {e}")
+                for _ in updates:
+                    task_done()
+                continue
+            try:
+                await handle(session_id, update)
+            except Exception as e:
+                logger.error(f"Error dispatching session update: {e}")
+            task_done()
+
     async def disconnect(self) -> None:
         """Disconnect from the ACP agent."""
-        # Clean up all terminals
-        for terminal_id, terminal in list(self._terminals.items()):
-            try:
-                terminal.process.kill()
-                await terminal.process.wait()
-            except Exception:
-                pass
+        # Stop dispatcher tasks (sentinel per task, then wait)
+        if self._dispatch_tasks:
+            for _ in self._dispatch_tasks:
+                await self._event_queue.put(None)
+            await asyncio.gather(*self._dispatch_tasks, return_exceptions=True)
+            self._dispatch_tasks = []
+
+        # Clean up all terminals concurrently; shutdown latency is the
+        # slowest wait instead of the sum of all waits
+        async def _kill_and_wait(terminal: TerminalProcess) -> None:
+            if terminal.reader_task:
+                terminal.reader_task.cancel()
+            terminal.process.kill()
+            await asyncio.wait_for(terminal.process.wait(), timeout=2.0)
+
+        if self._terminals:
+            await asyncio.gather(
+                *(_kill_and_wait(t) for t in self._terminals.values()),
+                return_exceptions=True,
+            )
         self._terminals.clear()
 
         # Close connection with timeout to avoid hanging
@@ -306,14 +521,24 @@ class AcpClient:
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
         await self.disconnect()
 
-    # --- Session management ---
+    @staticmethod
+    def run(coro: Coroutine[Any, Any, Any]) -> Any:
+        """
+        Run a coroutine under uvloop when it is installed.
 
-    async def new_session(self) -> str:
-        """Create a new session."""
-        if not self._connection:
-            raise RuntimeError("Not connected")
+        The event loop must be chosen before it starts, so this cannot be
+        done from connect(); use this instead of ``asyncio.run`` at the
+        top level to get the libuv pipe transports for the stdio stream.
+        Falls back to the default loop when uvloop is unavailable.
+        """
+        if uvloop is not None:
+            return uvloop.run(coro)
+        return asyncio.run(coro)
+
+    # --- Session management ---
 
-        # Convert MCP server configs to ACP schema
+    def _build_mcp_servers(self) -> list[McpServerStdio]:
+        """Convert MCP server config dicts to ACP schema objects."""
         mcp_servers_acp = []
         for srv in self.mcp_servers:
             env_vars = []
@@ -328,10 +553,20 @@ class AcpClient:
                     env=env_vars,
                 )
             )
+        return mcp_servers_acp
+
+    def invalidate_mcp_cache(self) -> None:
+        """Rebuild the cached ACP schema after mutating mcp_servers."""
+        self._mcp_servers_acp = self._build_mcp_servers()
+
+    async def new_session(self) -> str:
+        """Create a new session."""
+        if not self._connection:
+            raise RuntimeError("Not connected")
 
         response = await self._connection.new_session(
             cwd=self.cwd,
-            mcp_servers=mcp_servers_acp,
+            mcp_servers=self._mcp_servers_acp,
         )
         self._session_id = response.session_id
 
@@ -368,18 +603,25 @@ class AcpClient:
         if not self._session_id:
             await self.new_session()
 
-        self._text_buffer = ""
+        self._text_chunks = []
 
         try:
+            # model_construct skips Pydantic validation; the block shape
+            # is fixed and the text comes straight from the caller
+            block = TextContentBlock.model_construct(type="text", text=text)
             response = await self._connection.prompt(
-                prompt=[TextContentBlock(type="text", text=text)],
+                prompt=[block],
                 session_id=self._session_id,
             )
 
+            # Wait for queued session updates to be dispatched before
+            # reporting completion and returning the accumulated text
+            await self._event_queue.join()
+
             if self.events.on_complete:
                 await self.events.on_complete()
 
-            return self._text_buffer
+            return "".join(self._text_chunks)
 
         except Exception as e:
             if self.events.on_error:
@@ -421,345 +663,481 @@ class AcpClient:
 
     # --- Internal handlers ---
 
+    async def _handle_session_update(self, session_id: str, update: Any) -> None:
+        """Handle a queued session update from the agent."""
+        # The overwhelming majority of updates in a streaming session are
+        # message chunks; check that case inline before the dispatch probe
+        if type(update) is AgentMessageChunk:
+            await self._handle_message_chunk(update)
+            return
+        handler = _UPDATE_DISPATCH.get(type(update))
+        if handler is not None:
+            await handler(self, update)
+
+    async def _handle_message_chunk(self, update: AgentMessageChunk) -> None:
+        # Direct access with an AttributeError guard: the schema types are
+        # known, and the straight-line path beats getattr/hasattr probing
+        try:
+            text = update.content.text
+        except AttributeError:
+            return
+        if text:
+            self._text_chunks.append(text)
+            on_text = self.events.on_text
+            if on_text:
+                await on_text(text)
+
+    async def _handle_message_batch(self, updates: list[AgentMessageChunk]) -> None:
+        """Handle a coalesced run of message chunks with one on_text call."""
+        texts = []
+        for update in updates:
+            try:
+                text = update.content.text
+            except AttributeError:
+                continue
+            if text:
+                texts.append(text)
+        if texts:
+            self._text_chunks.extend(texts)
+            on_text = self.events.on_text
+            if on_text:
+                await on_text(texts[0] if len(texts) == 1 else "".join(texts))
+
+    async def _handle_thought_chunk(self, update: AgentThoughtChunk) -> None:
+        try:
+            text = update.content.text
+        except AttributeError:
+            return
+        on_thinking = self.events.on_thinking
+        if on_thinking:
+            await on_thinking(text)
+
+    async def _handle_tool_start(self, update: ToolCallStart) -> None:
+        on_tool_start = self.events.on_tool_start
+        if on_tool_start:
+            title = update.title
+            raw_input = update.raw_input
+            await on_tool_start(
+                update.tool_call_id,
+                title if title is not None else "",
+                _EMPTY if raw_input is None else raw_input,
+            )
+
+    async def _handle_tool_progress(self, update: ToolCallProgress) -> None:
+        on_tool_end = self.events.on_tool_end
+        if on_tool_end:
+            status = update.status
+            await on_tool_end(
+                update.tool_call_id,
+                status if status is not None else "",
+                update.raw_output,
+            )
+
     def _create_client_handler(self):
         """Create the client handler for receiving agent messages."""
-        client = self
-
-        class ClientHandler:
-            """Handles incoming messages from the agent."""
-
-            async def session_update(self, session_id: str, update: Any) -> None:
-                """Handle session updates from the agent."""
-                update_type = type(update).__name__
-
-                if isinstance(update, AgentMessageChunk):
-                    content = getattr(update, "content", None)
-                    if content and hasattr(content, "text"):
-                        text = content.text
-                        if text and text not in client._text_buffer:
-                            client._text_buffer += text
-                            if client.events.on_text:
-                                await client.events.on_text(text)
-
-                elif isinstance(update, AgentThoughtChunk):
-                    content = getattr(update, "content", None)
-                    if content and hasattr(content, "text"):
-                        if client.events.on_thinking:
-                            await client.events.on_thinking(content.text)
-
-                elif isinstance(update, ToolCallStart):
-                    if client.events.on_tool_start:
-                        await client.events.on_tool_start(
-                            update.tool_call_id,
-                            update.title or "",
-                            update.raw_input or {},
-                        )
-
-                elif isinstance(update, ToolCallProgress):
-                    if client.events.on_tool_end:
-                        await client.events.on_tool_end(
-                            update.tool_call_id,
-                            update.status or "",
-                            update.raw_output,
-                        )
-
-            async def request_permission(
-                self,
-                options: list[PermissionOption],
-                session_id: str,
-                tool_call: ToolCallUpdate,
-                **kwargs: Any,
-            ) -> RequestPermissionResponse:
-                """Handle permission requests from the agent."""
-                name = tool_call.title or "Unknown"
-                raw_input = tool_call.raw_input or {}
-                option_list = [{"id": o.option_id, "name": o.name} for o in options]
-
-                # Default to allow
-                selected_id = "allow"
-
-                if client.events.on_permission:
-                    selected_id = await client.events.on_permission(
-                        name, raw_input, option_list
-                    )
-
-                return RequestPermissionResponse(
-                    outcome=AllowedOutcome(outcome="selected", option_id=selected_id)
-                )
+        return _ClientHandler(self)
 
-            async def write_text_file(
-                self,
-                path: str,
-                content: str,
-                **kwargs,
-            ) -> None:
-                """
-                Handle write file requests from the agent.
-
-                The agent requests the client to write a file to disk.
-                This enables the agent to create/modify files in the user's filesystem.
-
-                Args:
-                    path: The file path to write to.
-                    content: The content to write.
-                """
-                # Check if handler wants to intercept/block the write
-                if client.events.on_file_write:
-                    allowed = await client.events.on_file_write(path, content)
-                    if not allowed:
-                        logger.info(f"File write blocked by handler: {path}")
-                        return
 
-                try:
-                    file_path = Path(path)
-                    # Create parent directories if they don't exist
-                    file_path.parent.mkdir(parents=True, exist_ok=True)
-                    # Write the file
-                    file_path.write_text(content, encoding="utf-8")
-                    logger.debug(f"Wrote file: {path}")
-                except Exception as e:
-                    logger.error(f"Failed to write file {path}: {e}")
-                    raise
-
-            async def read_text_file(
-                self,
-                path: str,
-                **kwargs,
-            ) -> dict:
-                """
-                Handle read file requests from the agent.
-
-                The agent requests the client to read a file from disk.
-                This enables the agent to access files in the user's filesystem.
-
-                Args:
-                    path: The file path to read.
-
-                Returns:
-                    A dict with 'content' key containing the file content.
-                """
-                # Check if handler wants to override the content
-                if client.events.on_file_read:
-                    override = await client.events.on_file_read(path)
-                    if override is not None:
-                        logger.debug(f"File read overridden by handler: {path}")
-                        return {"content": override}
+# Exact-type dispatch for session updates: one dict probe instead of an
+# isinstance chain per chunk (the acp schema delivers concrete instances)
+_UPDATE_DISPATCH = {
+    AgentMessageChunk: AcpClient._handle_message_chunk,
+    AgentThoughtChunk: AcpClient._handle_thought_chunk,
+    ToolCallStart: AcpClient._handle_tool_start,
+    ToolCallProgress: AcpClient._handle_tool_progress,
+}
 
-                try:
-                    file_path = Path(path)
-                    if not file_path.exists():
-                        logger.warning(f"File not found: {path}")
-                        return {"content": "", "error": f"File not found: {path}"}
-                    content = file_path.read_text(encoding="utf-8")
-                    logger.debug(f"Read file: {path} ({len(content)} chars)")
-                    return {"content": content}
-                except Exception as e:
-                    logger.error(f"Failed to read file {path}: {e}")
-                    return {"content": "", "error": str(e)}
-
-            async def create_terminal(
-                self,
-                command: str = "",
-                args: list[str] | None = None,
-                cwd: str | None = None,
-                env: dict[str, str] | None = None,
-                **kwargs,
-            ) -> dict:
-                """
-                Create a terminal and execute a command.
-
-                The agent requests the client to run a shell command.
-                This enables command execution in the user's environment.
-
-                Args:
-                    command: The command to execute.
-                    args: Command arguments.
-                    cwd: Working directory (defaults to client cwd).
-                    env: Additional environment variables.
-
-                Returns:
-                    A dict with 'terminal_id' for tracking the process.
-                """
-                work_dir = cwd or client.cwd
-                full_command = command
-                if args:
-                    full_command = f"{command} {' '.join(args)}"
-
-                # Check if handler wants to block the terminal creation
-                if client.events.on_terminal_create:
-                    allowed = await client.events.on_terminal_create(full_command, work_dir)
-                    if not allowed:
-                        logger.info(f"Terminal creation blocked by handler: {full_command}")
-                        return {"terminal_id": "", "error": "Terminal creation blocked"}
 
-                try:
-                    # Create the subprocess
-                    process = await asyncio.create_subprocess_shell(
-                        full_command,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.STDOUT,
-                        cwd=work_dir,
-                        env={**dict(env or {})} if env else None,
-                    )
-
-                    # Generate terminal ID
-                    client._terminal_counter += 1
-                    terminal_id = f"terminal-{client._terminal_counter}"
-
-                    # Store the terminal
-                    client._terminals[terminal_id] = TerminalProcess(
-                        process=process,
-                        command=full_command,
-                        cwd=work_dir,
-                        output_buffer=[],
-                    )
-
-                    logger.debug(f"Created terminal {terminal_id}: {full_command}")
-                    return {"terminal_id": terminal_id}
+class _ClientHandler:
+    """Handles incoming messages from the agent."""
 
-                except Exception as e:
-                    logger.error(f"Failed to create terminal: {e}")
-                    return {"terminal_id": "", "error": str(e)}
-
-            async def terminal_output(
-                self,
-                terminal_id: str = "",
-                **kwargs,
-            ) -> dict:
-                """
-                Get output from a terminal.
-
-                Args:
-                    terminal_id: The terminal to get output from.
-
-                Returns:
-                    A dict with 'output' containing available output.
-                """
-                terminal = client._terminals.get(terminal_id)
-                if not terminal:
-                    return {"output": "", "error": f"Terminal not found: {terminal_id}"}
+    def __init__(self, client: AcpClient) -> None:
+        self._client = client
 
-                try:
-                    # Try to read available output (non-blocking)
-                    if terminal.process.stdout:
-                        try:
-                            # Read with a short timeout
-                            output = await asyncio.wait_for(
-                                terminal.process.stdout.read(4096),
-                                timeout=0.1,
-                            )
-                            if output:
-                                decoded = output.decode("utf-8", errors="replace")
-                                terminal.output_buffer.append(decoded)
-
-                                # Notify handler if registered
-                                if client.events.on_terminal_output:
-                                    await client.events.on_terminal_output(terminal_id, decoded)
-
-                                return {"output": decoded}
-                        except asyncio.TimeoutError:
-                            pass
-
-                    # Return buffered output if no new output
-                    if terminal.output_buffer:
-                        return {"output": "".join(terminal.output_buffer)}
-                    return {"output": ""}
+    async def session_update(self, session_id: str, update: Any) -> None:
+        """Queue a session update; dispatcher tasks do the real work."""
+        await self._client._event_queue.put((session_id, update))
 
-                except Exception as e:
-                    logger.error(f"Failed to get terminal output: {e}")
-                    return {"output": "", "error": str(e)}
-
-            async def release_terminal(
-                self,
-                terminal_id: str = "",
-                **kwargs,
-            ) -> None:
-                """
-                Release a terminal without killing it.
-
-                The terminal continues running but we stop tracking it.
-
-                Args:
-                    terminal_id: The terminal to release.
-                """
-                if terminal_id in client._terminals:
-                    logger.debug(f"Released terminal: {terminal_id}")
-                    del client._terminals[terminal_id]
-
-            async def wait_for_terminal_exit(
-                self,
-                terminal_id: str = "",
-                **kwargs,
-            ) -> dict:
-                """
-                Wait for a terminal to exit and return its exit code.
-
-                Args:
-                    terminal_id: The terminal to wait for.
-
-                Returns:
-                    A dict with 'exit_code'.
-                """
-                terminal = client._terminals.get(terminal_id)
-                if not terminal:
-                    return {"exit_code": -1, "error": f"Terminal not found: {terminal_id}"}
+    async def request_permission(
+        self,
+        options: list[PermissionOption],
+        session_id: str,
+        tool_call: ToolCallUpdate,
+        **kwargs: Any,
+    ) -> RequestPermissionResponse:
+        """Handle permission requests from the agent."""
+        name = tool_call.title or "Unknown"
+        raw_input = _EMPTY if tool_call.raw_input is None else tool_call.raw_input
+        option_list = _permission_option_list(
+            tuple((o.option_id, o.name) for o in options)
+        )
 
-                try:
-                    # Read remaining output while waiting
-                    if terminal.process.stdout:
-                        remaining = await terminal.process.stdout.read()
-                        if remaining:
-                            decoded = remaining.decode("utf-8", errors="replace")
-                            terminal.output_buffer.append(decoded)
-                            if client.events.on_terminal_output:
-                                await client.events.on_terminal_output(terminal_id, decoded)
-
-                    # Wait for process to exit
-                    exit_code = await terminal.process.wait()
-                    terminal.exit_code = exit_code
-                    logger.debug(f"Terminal {terminal_id} exited with code {exit_code}")
-                    return {"exit_code": exit_code}
+        # Default to allow
+        selected_id = "allow"
 
-                except Exception as e:
-                    logger.error(f"Failed to wait for terminal exit: {e}")
-                    return {"exit_code": -1, "error": str(e)}
-
-            async def kill_terminal(
-                self,
-                terminal_id: str = "",
-                **kwargs,
-            ) -> None:
-                """
-                Kill a terminal process.
-
-                Args:
-                    terminal_id: The terminal to kill.
-                """
-                terminal = client._terminals.get(terminal_id)
-                if not terminal:
-                    return
+        if self._client.events.on_permission:
+            selected_id = await self._client.events.on_permission(
+                name, raw_input, option_list
+            )
 
-                try:
-                    terminal.process.kill()
-                    await terminal.process.wait()
-                    logger.debug(f"Killed terminal: {terminal_id}")
-                except Exception as e:
-                    logger.error(f"Failed to kill terminal: {e}")
+        return RequestPermissionResponse(
+            outcome=AllowedOutcome(outcome="selected", option_id=selected_id)
+        )
 
-                # Remove from tracking
-                if terminal_id in client._terminals:
-                    del client._terminals[terminal_id]
+    async def write_text_file(
+        self,
+        path: str,
+        content: str,
+        **kwargs,
+    ) -> None:
+        """
+        Handle write file requests from the agent.
 
-            async def ext_method(self, method: str, params: dict) -> dict:
-                """Handle extension methods."""
-                return {}
+        The agent requests the client to write a file to disk.
+        This enables the agent to create/modify files in the user's filesystem.
 
-            async def ext_notification(self, method: str, params: dict) -> None:
-                """Handle extension notifications."""
-                pass
+        Args:
+            path: The file path to write to.
+            content: The content to write.
+        """
+        # Check if handler wants to intercept/block the write
+        if self._client.events.on_file_write:
+            allowed = await self._client.events.on_file_write(path, content)
+            if not allowed:
+                logger.info(f"File write blocked by handler: {path}")
+                return
 
-            def on_connect(self, conn: Any) -> None:
-                """Called when connected."""
-                pass
+        try:
+            # Run blocking disk I/O in a worker thread so streaming
+            # session updates keep flowing while large files are written
+            await asyncio.to_thread(_write_file, path, content)
+            logger.debug(f"Wrote file: {path}")
+        except Exception as e:
+            logger.error(f"Failed to write file {path}: {e}")
+            raise
+
+    async def read_text_file(
+        self,
+        path: str,
+        **kwargs,
+    ) -> dict:
+        """
+        Handle read file requests from the agent.
+
+        The agent requests the client to read a file from disk.
+        This enables the agent to access files in the user's filesystem.
+
+        Args:
+            path: The file path to read.
+
+        Returns:
+            A dict with 'content' key containing the file content.
+        """
+        # Check if handler wants to override the content
+        if self._client.events.on_file_read:
+            override = await self._client.events.on_file_read(path)
+            if override is not None:
+                logger.debug(f"File read overridden by handler: {path}")
+                return {"content": override}
+
+        try:
+            # Run blocking disk I/O in a worker thread; multi-MB reads
+            # would otherwise stall the event loop
+            content = await asyncio.to_thread(_read_file, path)
+            logger.debug(f"Read file: {path} ({len(content)} chars)")
+            return {"content": content}
+        except FileNotFoundError:
+            logger.warning(f"File not found: {path}")
+            return {"content": "", "error": f"File not found: {path}"}
+        except Exception as e:
+            logger.error(f"Failed to read file {path}: {e}")
+            return {"content": "", "error": str(e)}
+
+    async def _terminal_reader(self, terminal_id: str, terminal: TerminalProcess) -> None:
+        """
+        Continuously drain a terminal's stdout into its output buffer.
+
+        Runs as a background task for the lifetime of the process, so
+        terminal_output polls never block waiting on the pipe and output
+        handlers fire as soon as data arrives.
+
+        Args:
+            terminal_id: The terminal being drained.
+            terminal: The terminal process record.
+        """
+        stdout = terminal.process.stdout
+        if stdout is None:
+            return
+        try:
+            while True:
+                data = await stdout.read(65536)
+                if not data:
+                    break
+                # Store raw bytes; decoding happens once at drain time
+                terminal.output_buffer.extend(data)
+                if self._client.events.on_terminal_output:
+                    decoded = data.decode("utf-8", errors="replace")
+                    await self._client.events.on_terminal_output(terminal_id, decoded)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Terminal reader failed for {terminal_id}: {e}")
+
+    async def create_terminal(
+        self,
+        command: str = "",
+        args: list[str] | None = None,
+        cwd: str | None = None,
+        env: dict[str, str] | None = None,
+        **kwargs,
+    ) -> dict:
+        """
+        Create a terminal and execute a command.
+
+        The agent requests the client to run a shell command.
+        This enables command execution in the user's environment.
+
+        Args:
+            command: The command to execute.
+            args: Command arguments.
+            cwd: Working directory (defaults to client cwd).
+            env: Additional environment variables.
+
+        Returns:
+            A dict with 'terminal_id' for tracking the process.
+        """
+        work_dir = cwd or self._client.cwd
+        full_command = command
+        if args:
+            full_command = f"{command} {' '.join(args)}"
+
+        # Check if handler wants to block the terminal creation
+        if self._client.events.on_terminal_create:
+            allowed = await self._client.events.on_terminal_create(full_command, work_dir)
+            if not allowed:
+                logger.info(f"Terminal creation blocked by handler: {full_command}")
+                return {"terminal_id": "", "error": "Terminal creation blocked"}
+
+        try:
+            # Create the subprocess
+            process = await asyncio.create_subprocess_shell(
+                full_command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=work_dir,
+                # Merge onto os.environ so the child keeps PATH etc.;
+                # the old double dict copy also dropped the inherited env
+                env={**os.environ, **env} if env else None,
+                # Raise the StreamReader limit so bursty output (compiler
+                # logs, test runners) is read in large chunks
+                limit=1 << 20,
+            )
+
+            # Generate terminal ID
+            self._client._terminal_counter += 1
+            terminal_id = f"terminal-{self._client._terminal_counter}"
+
+            # Store the terminal
+            terminal = TerminalProcess(
+                process=process,
+                command=full_command,
+                cwd=work_dir,
+                output_buffer=bytearray(),
+            )
+            self._client._terminals[terminal_id] = terminal
+
+            # Drain stdout continuously so polls never block on a read
+            terminal.reader_task = asyncio.create_task(
+                self._terminal_reader(terminal_id, terminal)
+            )
+
+            logger.debug(f"Created terminal {terminal_id}: {full_command}")
+            return {"terminal_id": terminal_id}
+
+        except Exception as e:
+            logger.error(f"Failed to create terminal: {e}")
+            return {"terminal_id": "", "error": str(e)}
+
+    async def terminal_output(
+        self,
+        terminal_id: str = "",
+        **kwargs,
+    ) -> dict:
+        """
+        Get output from a terminal.
+
+        Args:
+            terminal_id: The terminal to get output from.
+
+        Returns:
+            A dict with 'output' containing available output.
+        """
+        terminal = self._client._terminals.get(terminal_id)
+        if not terminal:
+            return {"output": "", "error": f"Terminal not found: {terminal_id}"}
+
+        # The reader task keeps the buffer current, so this is a pure
+        # in-memory drain with no pipe reads or timeouts: one copy of
+        # the accumulated bytes and a single decode
+        buf = terminal.output_buffer
+        if buf:
+            chunk = bytes(buf)
+            buf.clear()
+            return {"output": chunk.decode("utf-8", errors="replace")}
+        return {"output": ""}
+
+    async def release_terminal(
+        self,
+        terminal_id: str = "",
+        **kwargs,
+    ) -> None:
+        """
+        Release a terminal without killing it.
+
+        The terminal continues running but we stop tracking it.
+
+        Args:
+            terminal_id: The terminal to release.
+        """
+        terminal = self._client._terminals.pop(terminal_id, None)
+        if terminal:
+            if terminal.reader_task:
+                terminal.reader_task.cancel()
+            logger.debug(f"Released terminal: {terminal_id}")
+
+    async def wait_for_terminal_exit(
+        self,
+        terminal_id: str = "",
+        **kwargs,
+    ) -> dict:
+        """
+        Wait for a terminal to exit and return its exit code.
+
+        Args:
+            terminal_id: The terminal to wait for.
+
+        Returns:
+            A dict with 'exit_code'.
+        """
+        terminal = self._client._terminals.get(terminal_id)
+        if not terminal:
+            return {"exit_code": -1, "error": f"Terminal not found: {terminal_id}"}
+
+        try:
+            # Wait for process to exit; the reader task drains any
+            # remaining output before hitting EOF
+            exit_code = await terminal.process.wait()
+            if terminal.reader_task:
+                await terminal.reader_task
+            terminal.exit_code = exit_code
+            logger.debug(f"Terminal {terminal_id} exited with code {exit_code}")
+            return {"exit_code": exit_code}
+
+        except Exception as e:
+            logger.error(f"Failed to wait for terminal exit: {e}")
+            return {"exit_code": -1, "error": str(e)}
+
+    async def kill_terminal(
+        self,
+        terminal_id: str = "",
+        **kwargs,
+    ) -> None:
+        """
+        Kill a terminal process.
+
+        Args:
+            terminal_id: The terminal to kill.
+        """
+        terminal = self._client._terminals.get(terminal_id)
+        if not terminal:
+            return
+
+        try:
+            if terminal.reader_task:
+                terminal.reader_task.cancel()
+            terminal.process.kill()
+            await terminal.process.wait()
+            logger.debug(f"Killed terminal: {terminal_id}")
+        except Exception as e:
+            logger.error(f"Failed to kill terminal: {e}")
+
+        # Remove from tracking
+        if terminal_id in self._client._terminals:
+            del self._client._terminals[terminal_id]
+
+    async def ext_method(self, method: str, params: dict) -> dict:
+        """Handle extension methods."""
+        return {}
+
+    async def ext_notification(self, method: str, params: dict) -> None:
+        """Handle extension notifications."""
+        pass
+
+    def on_connect(self, conn: Any) -> None:
+        """Called when connected."""
+        pass
+
+
+class AcpClientPool:
+    """
+    Pool of warm, pre-connected AcpClient instances.
+
+    Spawning the agent subprocess and running the initialize() handshake
+    dominates per-client startup cost. The pool keeps released clients
+    connected so the next acquire() skips both.
+
+    Example:
+        ```python
+        pool = AcpClientPool(max_size=4, command="claude-code-acp")
+
+        client = await pool.acquire()
+        try:
+            await client.prompt("Hello!")
+        finally:
+            await pool.release(client)
+
+        await pool.close()
+        ```
+    """
+
+    def __init__(self, max_size: int = 4, **client_kwargs: Any):
+        """
+        Initialize the pool.
+
+        Args:
+            max_size: Maximum number of warm clients kept around.
+            **client_kwargs: Passed through to AcpClient() for each
+                client the pool creates.
+        """
+        self._client_kwargs = client_kwargs
+        self._idle: asyncio.Queue[AcpClient] = asyncio.Queue(maxsize=max_size)
+
+    async def acquire(self) -> AcpClient:
+        """Get a warm client, spawning a new one only on pool miss."""
+        try:
+            return self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            client = AcpClient(**self._client_kwargs)
+            await client.connect()
+            return client
+
+    async def release(self, client: AcpClient) -> None:
+        """Return a client to the pool, disconnecting it if the pool is full."""
+        # Drop the session so the next acquire starts fresh; the process
+        # and handshake are the expensive parts worth keeping warm
+        client._session_id = None
+        try:
+            self._idle.put_nowait(client)
+        except asyncio.QueueFull:
+            await client.disconnect()
+
+    async def close(self) -> None:
+        """Disconnect all idle clients concurrently."""
+        clients = []
+        while not self._idle.empty():
+            clients.append(self._idle.get_nowait())
+        if clients:
+            await asyncio.gather(
+                *(c.disconnect() for c in clients), return_exceptions=True
+            )
 
-        return ClientHandler()
@@ -7,10 +7,14 @@ messages to ACP session updates for bidirectional communication.
 
 from __future__ import annotations
 
+import asyncio
+import itertools
+import json
 import logging
+import secrets
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Any, Callable, Coroutine
-from uuid import uuid4
+from typing import TYPE_CHECKING, Any, Callable, Coroutine
 
 from acp import (
     Agent,
@@ -27,23 +31,24 @@ from acp import (
 from acp.interfaces import Client
 from acp.schema import (
     AgentCapabilities,
-    AudioContentBlock,
+    AuthenticateResponse,
     AvailableCommand,
     AvailableCommandInput,
-    ClientCapabilities,
-    EmbeddedResourceContentBlock,
+    ForkSessionResponse,
     HttpMcpServer,
-    ImageContentBlock,
     Implementation,
+    ListSessionsResponse,
+    LoadSessionResponse,
     McpServerStdio,
     ModelInfo,
     PermissionOption,
     PromptCapabilities,
-    ResourceContentBlock,
+    ResumeSessionResponse,
     SessionCapabilities,
+    SessionInfo,
     SessionModelState,
+    SetSessionModelResponse,
     SseMcpServer,
-    TextContentBlock,
 )
 from acp.helpers import update_available_commands
 
@@ -51,23 +56,113 @@ from claude_agent_sdk import (
     AssistantMessage,
     ClaudeAgentOptions,
     ClaudeSDKClient,
-    Message,
-    PermissionMode,
     PermissionResultAllow,
     PermissionResultDeny,
     ResultMessage,
     SystemMessage,
     TextBlock,
     ThinkingBlock,
-    ToolPermissionContext,
     ToolResultBlock,
     ToolUseBlock,
     UserMessage,
 )
 from claude_agent_sdk.types import StreamEvent
 
+if TYPE_CHECKING:
+    # Annotation-only names; `from __future__ import annotations` keeps
+    # them out of runtime so they don't cost anything at import
+    from acp.schema import (
+        AudioContentBlock,
+        ClientCapabilities,
+        EmbeddedResourceContentBlock,
+        ImageContentBlock,
+        ResourceContentBlock,
+        TextContentBlock,
+    )
+    from claude_agent_sdk import Message, PermissionMode, ToolPermissionContext
+
 logger = logging.getLogger(__name__)
 
+# Process-unique ID generator: a random prefix per process plus a counter
+# is far cheaper than uuid4() and ACP treats the IDs as opaque strings
+_id_counter = itertools.count()
+_id_prefix = secrets.token_hex(4)
+
+
+def _new_id() -> str:
+    return f"{_id_prefix}-{next(_id_counter):x}"
+
+
+# Permission modes accepted by set_session_mode
+_VALID_MODES = frozenset({"default", "acceptEdits", "plan", "bypassPermissions", "dontAsk"})
+
+# Tools auto-allowed in acceptEdits mode
+_EDIT_TOOLS = frozenset({"Write", "Edit", "MultiEdit"})
+
+# Every session starts with the same mode payload; built once and shared
+# (serialized immediately by the framework, never mutated)
+_DEFAULT_MODES = {
+    "current_mode_id": "default",
+    "available_modes": [
+        {
+            "id": "default",
+            "name": "Default",
+            "description": "Standard behavior, prompts for dangerous operations",
+        },
+        {
+            "id": "acceptEdits",
+            "name": "Accept Edits",
+            "description": "Auto-accept file edit operations",
+        },
+        {
+            "id": "plan",
+            "name": "Plan Mode",
+            "description": "Planning mode, no actual tool execution",
+        },
+        {
+            "id": "bypassPermissions",
+            "name": "Bypass Permissions",
+            "description": "Bypass all permission checks",
+        },
+    ],
+}
+
+# The permission prompt always offers the same three choices; build once
+_PERMISSION_OPTIONS = [
+    PermissionOption(
+        kind="allow_always",
+        name="Always Allow",
+        option_id="allow_always",
+    ),
+    PermissionOption(
+        kind="allow_once",
+        name="Allow",
+        option_id="allow",
+    ),
+    PermissionOption(
+        kind="reject_once",
+        name="Reject",
+        option_id="reject",
+    ),
+]
+
+
+def _bash_title(tool_input: dict[str, Any]) -> str:
+    cmd = tool_input.get("command", "")
+    return f"Run: {cmd[:50]}..." if len(cmd) > 50 else f"Run: {cmd}"
+
+
+# Per-tool title formatters: one hash lookup replaces the if/elif cascade
+# run on every tool call and permission prompt
+_TITLE_HANDLERS: dict[str, Callable[[dict[str, Any]], str]] = {
+    "Read": lambda i: f"Read {i.get('file_path', i.get('path', ''))}",
+    "Write": lambda i: f"Write {i.get('file_path', i.get('path', ''))}",
+    "Edit": lambda i: f"Edit {i.get('file_path', i.get('path', ''))}",
+    "Bash": _bash_title,
+    "Glob": lambda i: f"Find files: {i.get('pattern', '')}",
+    "Grep": lambda i: f"Search: {i.get('pattern', '')}",
+}
+
 
 @dataclass
 class Session:
@@ -77,7 +172,6 @@ class Session:
     cwd: str
     permission_mode: PermissionMode = "default"
     cancelled: bool = False
-    tool_use_cache: dict[str, ToolUseBlock] = field(default_factory=dict)
     mcp_servers: dict[str, Any] = field(default_factory=dict)
     system_prompt: str | dict | None = None
     # Model to use for this session
@@ -85,10 +179,19 @@ class Session:
     # Keep client alive for multi-turn conversations
     client: ClaudeSDKClient | None = None
     client_started: bool = False
+    # Cached SDK options and permission handler; rebuilt only when the
+    # mode or model changes instead of on every prompt
+    options: ClaudeAgentOptions | None = None
+    permission_handler: Callable[..., Any] | None = None
     # Track streamed text to avoid duplicate sends
     streamed_text: str = ""
+    # Tool calls the user granted "Always Allow"; keyed by canonical
+    # (tool_name, input) so identical calls skip the permission round-trip
+    allow_always: set[tuple[str, str]] = field(default_factory=set)
     # Server info from get_server_info() - contains commands, models, etc.
     server_info: dict[str, Any] | None = None
+    # Serializes prompts on the shared client; cancel stays lock-free
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
 
 
 class ClaudeAcpAgent(Agent):
@@ -102,10 +205,31 @@ class ClaudeAcpAgent(Agent):
     4. Handles bidirectional communication (permissions, file ops, etc.)
     """
 
+    # Bounded cache size for formatted tool titles
+    _TITLE_CACHE_SIZE = 256
+    # Delta coalescing: flush pending stream deltas after this many
+    # seconds or once this many characters are buffered
+    _FLUSH_INTERVAL = 0.016
+    _FLUSH_CHARS = 256
+
     def __init__(self) -> None:
         self._conn: Client | None = None
         self._sessions: dict[str, Session] = {}
         self._on_result: Callable[[ResultMessage], Coroutine[Any, Any, None]] | None = None
+        # LRU of formatted tool titles; the title is computed twice per
+        # tool call (tool start + permission prompt) and agents revisit
+        # the same files/commands often
+        self._title_cache: OrderedDict[tuple, str] = OrderedDict()
+        # Per-session buffers of coalesced stream deltas; Claude emits
+        # token-granularity deltas and one session_update per token means
+        # hundreds of JSON-RPC frames per response
+        self._pending_text: dict[str, list[str]] = {}
+        self._pending_thought: dict[str, list[str]] = {}
+        self._pending_sizes: dict[str, int] = {}
+        self._flush_handles: dict[str, asyncio.TimerHandle] = {}
+        # initialize() returns the same response per protocol version;
+        # cache it so reconnect-heavy clients skip the model construction
+        self._init_response_cache: dict[int, InitializeResponse] = {}
 
     def on_connect(self, conn: Client) -> None:
         """Called when an ACP client connects."""
@@ -122,7 +246,11 @@ class ClaudeAcpAgent(Agent):
         """Handle ACP initialize request."""
         logger.info(f"Initialize request from {client_info}")
 
-        return InitializeResponse(
+        cached = self._init_response_cache.get(protocol_version)
+        if cached is not None:
+            return cached
+
+        response = InitializeResponse(
             protocol_version=protocol_version,
             agent_capabilities=AgentCapabilities(
                 prompt_capabilities=PromptCapabilities(
@@ -148,6 +276,8 @@ class ClaudeAcpAgent(Agent):
                 }
             ],
         )
+        self._init_response_cache[protocol_version] = response
+        return response
 
     async def new_session(
         self,
@@ -157,9 +287,7 @@ class ClaudeAcpAgent(Agent):
         **kwargs: Any,
     ) -> NewSessionResponse:
         """Create a new Claude session."""
-        import asyncio
-
-        session_id = str(uuid4())
+        session_id = _new_id()
 
         # Convert ACP MCP servers to Claude SDK format
         sdk_mcp_servers = self._convert_mcp_servers(mcp_servers)
@@ -188,31 +316,7 @@ class ClaudeAcpAgent(Agent):
         return NewSessionResponse(
             session_id=session_id,
             models=models_state,
-            modes={
-                "current_mode_id": "default",
-                "available_modes": [
-                    {
-                        "id": "default",
-                        "name": "Default",
-                        "description": "Standard behavior, prompts for dangerous operations",
-                    },
-                    {
-                        "id": "acceptEdits",
-                        "name": "Accept Edits",
-                        "description": "Auto-accept file edit operations",
-                    },
-                    {
-                        "id": "plan",
-                        "name": "Plan Mode",
-                        "description": "Planning mode, no actual tool execution",
-                    },
-                    {
-                        "id": "bypassPermissions",
-                        "name": "Bypass Permissions",
-                        "description": "Bypass all permission checks",
-                    },
-                ],
-            },
+            modes=_DEFAULT_MODES,
         )
 
     async def set_session_mode(
@@ -222,11 +326,15 @@ class ClaudeAcpAgent(Agent):
         if session_id not in self._sessions:
             raise ValueError(f"Session not found: {session_id}")
 
-        valid_modes = ["default", "acceptEdits", "plan", "bypassPermissions", "dontAsk"]
-        if mode_id not in valid_modes:
+        if mode_id not in _VALID_MODES:
             raise ValueError(f"Invalid mode: {mode_id}")
 
-        self._sessions[session_id].permission_mode = mode_id  # type: ignore
+        session = self._sessions[session_id]
+        session.permission_mode = mode_id  # type: ignore
+        # A mode switch changes what needs asking; drop remembered grants
+        # and the cached options built for the old mode
+        session.allow_always.clear()
+        session.options = None
         logger.info(f"Session {session_id} mode changed to {mode_id}")
 
         return SetSessionModeResponse()
@@ -254,6 +362,10 @@ class ClaudeAcpAgent(Agent):
         if session_id not in self._sessions:
             raise ValueError(f"Session not found: {session_id}")
 
+        # Invariant for the whole receive loop: on_connect has run, so the
+        # per-message handlers don't re-check the connection
+        assert self._conn is not None, "Agent not connected"
+
         session = self._sessions[session_id]
         session.cancelled = False
         session.streamed_text = ""  # Reset for new turn
@@ -263,77 +375,97 @@ class ClaudeAcpAgent(Agent):
 
         logger.info(f"Prompt for session {session_id}: {prompt_text[:100]}...")
 
-        # Build Claude options with MCP servers and permission callback
-        # Use --strict-mcp-config when MCP servers are provided to ensure only
-        # the specified servers are loaded (ignoring user/project configs)
-        extra_args = {}
-        if session.mcp_servers:
-            extra_args["strict-mcp-config"] = None
-
-        options = ClaudeAgentOptions(
-            cwd=session.cwd,
-            permission_mode=session.permission_mode,
-            include_partial_messages=True,
-            mcp_servers=session.mcp_servers if session.mcp_servers else {},
-            system_prompt=session.system_prompt,
-            model=session.model,
-            extra_args=extra_args,
-        )
+        # Reuse the cached options; set_session_mode/set_session_model
+        # invalidate them when the configuration changes
+        options = session.options
+        if options is None:
+            options = self._build_session_options(session)
+            session.options = options
 
-        # Add permission callback if not bypassing permissions
-        if session.permission_mode != "bypassPermissions":
-            options = ClaudeAgentOptions(
-                cwd=session.cwd,
-                permission_mode=session.permission_mode,
-                include_partial_messages=True,
-                mcp_servers=session.mcp_servers if session.mcp_servers else {},
-                system_prompt=session.system_prompt,
-                model=session.model,
-                extra_args=extra_args,
-                can_use_tool=self._create_permission_handler(session_id),
-            )
+        # Serialize prompts per session: concurrent queries would
+        # interleave writes on the shared SDK client's stream
+        async with session.lock:
+            try:
+                # Reuse existing client for multi-turn conversations, or create new one
+                if session.client is None or not session.client_started:
+                    session.client = ClaudeSDKClient(options)
+                    await session.client.__aenter__()
+                    session.client_started = True
+                    logger.info(f"Created new ClaudeSDKClient for session {session_id}")
 
-        try:
-            # Reuse existing client for multi-turn conversations, or create new one
-            if session.client is None or not session.client_started:
-                session.client = ClaudeSDKClient(options)
-                await session.client.__aenter__()
-                session.client_started = True
-                logger.info(f"Created new ClaudeSDKClient for session {session_id}")
+                client = session.client
 
-            client = session.client
+                # Send the query
+                await client.query(prompt_text)
 
-            # Send the query
-            await client.query(prompt_text)
+                # Receive and process messages
+                async for message in client.receive_response():
+                    if session.cancelled:
+                        await client.interrupt()
+                        await self._flush_deltas(session_id)
+                        return PromptResponse(stop_reason="cancelled")
 
-            # Receive and process messages
-            async for message in client.receive_response():
-                if session.cancelled:
-                    await client.interrupt()
-                    return PromptResponse(stop_reason="cancelled")
+                    await self._handle_message(session_id, message)
 
-                await self._handle_message(session_id, message)
+                # Deliver any deltas still buffered when the stream ends
+                await self._flush_deltas(session_id)
 
-        except Exception as e:
-            logger.error(f"Error in prompt: {e}")
-            # On error, close the client so next prompt creates a fresh one
-            if session.client and session.client_started:
-                try:
-                    await session.client.__aexit__(None, None, None)
-                except Exception:
-                    pass
-                session.client = None
-                session.client_started = False
-            raise
+            except Exception as e:
+                logger.error(f"Error in prompt: {e}")
+                # On error, close the client so next prompt creates a fresh one
+                if session.client and session.client_started:
+                    try:
+                        await session.client.__aexit__(None, None, None)
+                    except Exception:
+                        pass
+                    session.client = None
+                    session.client_started = False
+                raise
 
         return PromptResponse(stop_reason="end_turn")
 
     async def cancel(self, session_id: str, **kwargs: Any) -> None:
-        """Cancel the current operation for a session."""
+        """Cancel the current operation for a session.
+
+        Deliberately lock-free: it must run while prompt() holds the
+        session lock, so it only flips the flag the receive loop checks.
+        """
         if session_id in self._sessions:
             self._sessions[session_id].cancelled = True
+            await self._flush_deltas(session_id)
             logger.info(f"Session {session_id} cancelled")
 
+    def _build_session_options(self, session: Session) -> ClaudeAgentOptions:
+        """Build the Claude SDK options for a session.
+
+        Uses --strict-mcp-config when MCP servers are provided to ensure
+        only the specified servers are loaded (ignoring user/project
+        configs), and attaches the permission callback unless the session
+        bypasses permissions.
+        """
+        extra_args = {}
+        if session.mcp_servers:
+            extra_args["strict-mcp-config"] = None
+
+        can_use_tool = None
+        if session.permission_mode != "bypassPermissions":
+            if session.permission_handler is None:
+                session.permission_handler = self._create_permission_handler(
+                    session.session_id
+                )
+            can_use_tool = session.permission_handler
+
+        return ClaudeAgentOptions(
+            cwd=session.cwd,
+            permission_mode=session.permission_mode,
+            include_partial_messages=True,
+            mcp_servers=session.mcp_servers if session.mcp_servers else {},
+            system_prompt=session.system_prompt,
+            model=session.model,
+            extra_args=extra_args,
+            can_use_tool=can_use_tool,
+        )
+
     # --- Conversion Methods ---
 
     def _convert_prompt_to_text(
@@ -347,26 +479,47 @@ class ClaudeAcpAgent(Agent):
         ],
     ) -> str:
         """Convert ACP prompt blocks to text for Claude."""
-        parts = []
-
-        for block in prompt:
+        # Fast path: the typical chat prompt is one text block
+        if len(prompt) == 1:
+            block = prompt[0]
             if isinstance(block, dict):
-                block_type = block.get("type")
-                if block_type == "text":
-                    parts.append(block.get("text", ""))
-                elif block_type == "resource":
-                    resource = block.get("resource", {})
-                    if "text" in resource:
-                        uri = resource.get("uri", "unknown")
-                        parts.append(f"\n<context ref=\"{uri}\">\n{resource['text']}\n</context>")
-                elif block_type == "resource_link":
-                    uri = block.get("uri", "")
-                    name = block.get("name", uri.split("/")[-1])
-                    parts.append(f"[@{name}]({uri})")
+                if block.get("type") == "text":
+                    return block.get("text", "")
             elif hasattr(block, "text"):
-                parts.append(block.text)
+                return block.text
+
+        # All-text prompts (the common multi-block case) skip the
+        # per-block dispatch and feed join from a plain generator
+        if all(isinstance(b, dict) and b.get("type") == "text" for b in prompt):
+            return "\n".join(b.get("text", "") for b in prompt)
+
+        # Generator feeds join directly; no intermediate parts list
+        return "\n".join(
+            text
+            for text in map(self._prompt_block_to_text, prompt)
+            if text is not None
+        )
 
-        return "\n".join(parts)
+    @staticmethod
+    def _prompt_block_to_text(block: Any) -> str | None:
+        """Render a single prompt block to text, or None if unsupported."""
+        if isinstance(block, dict):
+            block_type = block.get("type")
+            if block_type == "text":
+                return block.get("text", "")
+            if block_type == "resource":
+                resource = block.get("resource", {})
+                if "text" in resource:
+                    uri = resource.get("uri", "unknown")
+                    return f"\n<context ref=\"{uri}\">\n{resource['text']}\n</context>"
+            elif block_type == "resource_link":
+                uri = block.get("uri", "")
+                name = block.get("name", uri.split("/")[-1])
+                return f"[@{name}]({uri})"
+            return None
+        if hasattr(block, "text"):
+            return block.text
+        return None
 
     def _convert_mcp_servers(
         self,
@@ -439,42 +592,46 @@ class ClaudeAcpAgent(Agent):
 
     async def _handle_message(self, session_id: str, message: Message) -> None:
         """Convert and emit a Claude message as ACP updates."""
-        if self._conn is None:
-            return
-
         session = self._sessions.get(session_id)
         if session is None:
             return
 
-        if isinstance(message, AssistantMessage):
-            await self._handle_assistant_message(session_id, message, session)
-
-        elif isinstance(message, StreamEvent):
-            await self._handle_stream_event(session_id, message)
+        handler = _MESSAGE_DISPATCH.get(type(message))
+        if handler is not None:
+            await handler(self, session_id, message, session)
 
-        elif isinstance(message, SystemMessage):
-            # System messages (init, status, etc.) - log but don't emit
-            logger.debug(f"System message: {message.subtype}")
+    async def _on_stream_event(
+        self, session_id: str, message: StreamEvent, session: Session
+    ) -> None:
+        await self._handle_stream_event(session_id, message)
 
-        elif isinstance(message, ResultMessage):
-            # Result message - session complete
-            logger.info(f"Session {session_id} completed: {message.subtype}")
-            if self._on_result is not None:
-                await self._on_result(message)
+    async def _on_system_message(
+        self, session_id: str, message: SystemMessage, session: Session
+    ) -> None:
+        # System messages (init, status, etc.) - log but don't emit
+        logger.debug(f"System message: {message.subtype}")
 
-        elif isinstance(message, UserMessage):
-            # User messages may contain tool results
-            await self._handle_user_message(session_id, message, session)
+    async def _on_result_message(
+        self, session_id: str, message: ResultMessage, session: Session
+    ) -> None:
+        # Result message - session complete
+        logger.info(f"Session {session_id} completed: {message.subtype}")
+        if self._on_result is not None:
+            await self._on_result(message)
 
     async def _handle_assistant_message(
         self, session_id: str, message: AssistantMessage, session: Session
     ) -> None:
         """Handle an assistant message from Claude."""
-        if self._conn is None:
-            return
+        # Deliver any buffered deltas before the non-delta updates below
+        await self._flush_deltas(session_id)
 
+        # Hoist the send path out of the loop; the SDK delivers concrete
+        # block instances, so exact-type compares replace isinstance walks
+        send = self._conn.session_update
         for block in message.content:
-            if isinstance(block, TextBlock):
+            block_type = type(block)
+            if block_type is TextBlock:
                 # Skip if this text was already sent via streaming
                 if session.streamed_text and block.text == session.streamed_text:
                     # Clear streamed_text for next turn
@@ -485,30 +642,28 @@ class ClaudeAcpAgent(Agent):
                     remaining = block.text[len(session.streamed_text):]
                     session.streamed_text = ""
                     if remaining:
-                        await self._conn.session_update(
+                        await send(
                             session_id,
                             update_agent_message(text_block(remaining)),
                         )
                     continue
                 # Clear any streamed text and send full message
                 session.streamed_text = ""
-                await self._conn.session_update(
+                await send(
                     session_id,
                     update_agent_message(text_block(block.text)),
                 )
 
-            elif isinstance(block, ThinkingBlock):
+            elif block_type is ThinkingBlock:
                 # Thinking/reasoning content
-                await self._conn.session_update(
+                await send(
                     session_id,
                     update_agent_thought(text_block(block.thinking)),
                 )
 
-            elif isinstance(block, ToolUseBlock):
+            elif block_type is ToolUseBlock:
                 # Tool invocation
-                session.tool_use_cache[block.id] = block
-
-                await self._conn.session_update(
+                await send(
                     session_id,
                     start_tool_call(
                         tool_call_id=block.id,
@@ -518,11 +673,11 @@ class ClaudeAcpAgent(Agent):
                     ),
                 )
 
-            elif isinstance(block, ToolResultBlock):
+            elif block_type is ToolResultBlock:
                 # Tool result
                 status = "failed" if block.is_error else "completed"
 
-                await self._conn.session_update(
+                await send(
                     session_id,
                     update_tool_call(
                         tool_call_id=block.tool_use_id,
@@ -535,15 +690,13 @@ class ClaudeAcpAgent(Agent):
         self, session_id: str, message: UserMessage, session: Session
     ) -> None:
         """Handle a user message (which may contain tool results)."""
-        if self._conn is None:
-            return
-
+        send = self._conn.session_update
         for block in message.content:
-            if isinstance(block, ToolResultBlock):
+            if type(block) is ToolResultBlock:
                 # Tool result
                 status = "failed" if block.is_error else "completed"
 
-                await self._conn.session_update(
+                await send(
                     session_id,
                     update_tool_call(
                         tool_call_id=block.tool_use_id,
@@ -553,55 +706,119 @@ class ClaudeAcpAgent(Agent):
                 )
 
     async def _handle_stream_event(self, session_id: str, event: StreamEvent) -> None:
-        """Handle a streaming event from Claude."""
-        if self._conn is None:
-            return
+        """Handle a streaming event from Claude.
 
+        Deltas are buffered and flushed as one combined update per
+        _FLUSH_INTERVAL / _FLUSH_CHARS window instead of one JSON-RPC
+        frame per token.
+        """
         event_data = event.event
-        event_type = event_data.get("type")
-
-        if event_type == "content_block_delta":
-            delta = event_data.get("delta", {})
-            delta_type = delta.get("type")
-
-            if delta_type == "text_delta":
-                text = delta.get("text", "")
-                if text:
-                    # Track streamed text to avoid duplicate in _handle_message
-                    if session_id in self._sessions:
-                        self._sessions[session_id].streamed_text += text
-                    await self._conn.session_update(
-                        session_id,
-                        update_agent_message(text_block(text)),
-                    )
+        # Non-delta events (content_block_start, message_delta, ping, ...)
+        # arrive constantly during streaming and carry nothing to forward
+        if event_data.get("type") != "content_block_delta":
+            return
 
-            elif delta_type == "thinking_delta":
-                thinking = delta.get("thinking", "")
-                if thinking:
-                    await self._conn.session_update(
-                        session_id,
-                        update_agent_thought(text_block(thinking)),
-                    )
+        delta = event_data.get("delta", {})
+        delta_type = delta.get("type")
+
+        if delta_type == "text_delta":
+            text = delta.get("text", "")
+            if text:
+                # Track streamed text to avoid duplicate in _handle_message
+                if session_id in self._sessions:
+                    self._sessions[session_id].streamed_text += text
+                # Keep thought/text ordering: drain pending thoughts
+                # before buffering a different delta kind
+                if self._pending_thought.get(session_id):
+                    await self._flush_deltas(session_id)
+                self._pending_text.setdefault(session_id, []).append(text)
+                await self._buffered_delta(session_id, len(text))
+
+        elif delta_type == "thinking_delta":
+            thinking = delta.get("thinking", "")
+            if thinking:
+                if self._pending_text.get(session_id):
+                    await self._flush_deltas(session_id)
+                self._pending_thought.setdefault(session_id, []).append(thinking)
+                await self._buffered_delta(session_id, len(thinking))
+
+    async def _buffered_delta(self, session_id: str, size: int) -> None:
+        """Account for a buffered delta and flush or schedule a flush."""
+        pending = self._pending_sizes.get(session_id, 0) + size
+        self._pending_sizes[session_id] = pending
+        if pending >= self._FLUSH_CHARS:
+            await self._flush_deltas(session_id)
+        elif session_id not in self._flush_handles:
+            loop = asyncio.get_running_loop()
+            self._flush_handles[session_id] = loop.call_later(
+                self._FLUSH_INTERVAL, self._flush_soon, session_id
+            )
+
+    def _flush_soon(self, session_id: str) -> None:
+        """Timer callback: flush pending deltas from a fresh task."""
+        self._flush_handles.pop(session_id, None)
+        asyncio.ensure_future(self._flush_deltas(session_id))
+
+    async def _flush_deltas(self, session_id: str) -> None:
+        """Emit buffered deltas as combined session updates."""
+        handle = self._flush_handles.pop(session_id, None)
+        if handle is not None:
+            handle.cancel()
+        self._pending_sizes.pop(session_id, None)
+        text_parts = self._pending_text.pop(session_id, None)
+        thought_parts = self._pending_thought.pop(session_id, None)
+        if self._conn is None:
+            return
+        if thought_parts:
+            await self._conn.session_update(
+                session_id,
+                update_agent_thought(text_block("".join(thought_parts))),
+            )
+        if text_parts:
+            await self._conn.session_update(
+                session_id,
+                update_agent_message(text_block("".join(text_parts))),
+            )
 
     def _get_tool_title(self, tool_name: str, tool_input: dict[str, Any]) -> str:
-        """Generate a human-readable title for a tool call."""
-        if tool_name == "Read":
-            path = tool_input.get("file_path", tool_input.get("path", ""))
-            return f"Read {path}"
-        elif tool_name in ["Write", "Edit"]:
-            path = tool_input.get("file_path", tool_input.get("path", ""))
-            return f"{tool_name} {path}"
-        elif tool_name == "Bash":
-            cmd = tool_input.get("command", "")
-            return f"Run: {cmd[:50]}..." if len(cmd) > 50 else f"Run: {cmd}"
-        elif tool_name == "Glob":
-            pattern = tool_input.get("pattern", "")
-            return f"Find files: {pattern}"
-        elif tool_name == "Grep":
-            pattern = tool_input.get("pattern", "")
-            return f"Search: {pattern}"
-        else:
-            return tool_name
+        """Generate a human-readable title for a tool call (LRU cached)."""
+        # Key only on the fields the formatting actually uses, so two
+        # dicts describing the same call share a cache entry
+        key = (
+            tool_name,
+            tool_input.get("file_path") or tool_input.get("path"),
+            tool_input.get("command"),
+            tool_input.get("pattern"),
+        )
+        cache = self._title_cache
+        title = cache.get(key)
+        if title is not None:
+            cache.move_to_end(key)
+            return title
+        title = self._format_tool_title(tool_name, tool_input)
+        cache[key] = title
+        if len(cache) > self._TITLE_CACHE_SIZE:
+            cache.popitem(last=False)
+        return title
+
+    def _format_tool_title(self, tool_name: str, tool_input: dict[str, Any]) -> str:
+        """Format the human-readable title for a tool call."""
+        handler = _TITLE_HANDLERS.get(tool_name)
+        return handler(tool_input) if handler is not None else tool_name
+
+    def _permission_cache_key(
+        self, tool_name: str, tool_input: dict[str, Any]
+    ) -> tuple[str, str] | None:
+        """Canonical key for remembering 'Always Allow' decisions."""
+        if tool_name in ("Read", "Write", "Edit", "MultiEdit"):
+            path = tool_input.get("file_path") or tool_input.get("path") or ""
+            return (tool_name, path)
+        if tool_name == "Bash":
+            return (tool_name, tool_input.get("command", ""))
+        try:
+            return (tool_name, json.dumps(tool_input, sort_keys=True, default=str))
+        except (TypeError, ValueError):
+            return None
 
     def _create_permission_handler(self, session_id: str):
         """Create a permission handler for bidirectional permission requests."""
@@ -625,34 +842,20 @@ class ClaudeAcpAgent(Agent):
             if session.permission_mode == "bypassPermissions":
                 return PermissionResultAllow()
 
-            if session.permission_mode == "acceptEdits" and tool_name in [
-                "Write",
-                "Edit",
-                "MultiEdit",
-            ]:
+            if session.permission_mode == "acceptEdits" and tool_name in _EDIT_TOOLS:
+                return PermissionResultAllow()
+
+            # Skip the round-trip when the user already chose Always Allow
+            # for an identical call; the RPC dominates permission latency
+            cache_key = self._permission_cache_key(tool_name, tool_input)
+            if cache_key is not None and cache_key in session.allow_always:
                 return PermissionResultAllow()
 
             # Request permission from ACP client
-            tool_use_id = str(uuid4())
+            tool_use_id = _new_id()
 
             response = await self._conn.request_permission(
-                options=[
-                    PermissionOption(
-                        kind="allow_always",
-                        name="Always Allow",
-                        option_id="allow_always",
-                    ),
-                    PermissionOption(
-                        kind="allow_once",
-                        name="Allow",
-                        option_id="allow",
-                    ),
-                    PermissionOption(
-                        kind="reject_once",
-                        name="Reject",
-                        option_id="reject",
-                    ),
-                ],
+                options=_PERMISSION_OPTIONS,
                 session_id=session_id,
                 tool_call={
                     "tool_call_id": tool_use_id,
@@ -666,6 +869,8 @@ class ClaudeAcpAgent(Agent):
             if outcome and outcome.outcome == "selected":
                 option_id = outcome.option_id
                 if option_id in ["allow", "allow_always"]:
+                    if option_id == "allow_always" and cache_key is not None:
+                        session.allow_always.add(cache_key)
                     return PermissionResultAllow()
 
             return PermissionResultDeny(message="User denied permission")
@@ -805,8 +1010,6 @@ class ClaudeAcpAgent(Agent):
         **kwargs: Any,
     ):
         """List available sessions."""
-        from acp.schema import ListSessionsResponse, SessionInfo
-
         sessions = []
         for session_id, session in self._sessions.items():
             if cwd is None or session.cwd == cwd:
@@ -827,8 +1030,6 @@ class ClaudeAcpAgent(Agent):
         **kwargs: Any,
     ):
         """Load an existing session."""
-        from acp.schema import LoadSessionResponse
-
         if session_id not in self._sessions:
             return None
 
@@ -845,12 +1046,10 @@ class ClaudeAcpAgent(Agent):
         **kwargs: Any,
     ):
         """Fork an existing session."""
-        from acp.schema import ForkSessionResponse
-
         if session_id not in self._sessions:
             raise ValueError(f"Session not found: {session_id}")
 
-        new_session_id = str(uuid4())
+        new_session_id = _new_id()
         old_session = self._sessions[session_id]
 
         self._sessions[new_session_id] = Session(
@@ -871,8 +1070,6 @@ class ClaudeAcpAgent(Agent):
         **kwargs: Any,
     ):
         """Resume an existing session."""
-        from acp.schema import ResumeSessionResponse
-
         if session_id not in self._sessions:
             raise ValueError(f"Session not found: {session_id}")
 
@@ -886,8 +1083,6 @@ class ClaudeAcpAgent(Agent):
 
     async def authenticate(self, method_id: str, **kwargs: Any):
         """Handle authentication requests."""
-        from acp.schema import AuthenticateResponse
-
         logger.info(f"Authentication requested: {method_id}")
 
         # For Claude login, the user needs to run `claude /login` in terminal
@@ -901,12 +1096,11 @@ class ClaudeAcpAgent(Agent):
         **kwargs: Any,
     ):
         """Set the model for a session."""
-        from acp.schema import SetSessionModelResponse
-
         session = self._sessions.get(session_id)
         if session:
             logger.info(f"Setting model for session {session_id}: {model_id}")
             session.model = model_id
+            session.options = None
             # Close existing client so next prompt creates a fresh one with the new model
             if session.client and session.client_started:
                 try:
@@ -928,6 +1122,14 @@ class ClaudeAcpAgent(Agent):
         if session is None:
             return
 
+        # Drop any buffered deltas and their flush timer
+        handle = self._flush_handles.pop(session_id, None)
+        if handle is not None:
+            handle.cancel()
+        self._pending_text.pop(session_id, None)
+        self._pending_thought.pop(session_id, None)
+        self._pending_sizes.pop(session_id, None)
+
         if session.client and session.client_started:
             try:
                 await session.client.__aexit__(None, None, None)
@@ -961,3 +1163,14 @@ class ClaudeAcpAgent(Agent):
     async def ext_notification(self, method: str, params: dict[str, Any]) -> None:
         """Handle extension notifications."""
         logger.info(f"Extension notification: {method}")
+
+
+# Exact-type dispatch for Claude messages: one dict probe instead of an
+# isinstance chain per message (the SDK delivers concrete instances)
+_MESSAGE_DISPATCH = {
+    AssistantMessage: ClaudeAcpAgent._handle_assistant_message,
+    StreamEvent: ClaudeAcpAgent._on_stream_event,
+    SystemMessage: ClaudeAcpAgent._on_system_message,
+    ResultMessage: ClaudeAcpAgent._on_result_message,
+    UserMessage: ClaudeAcpAgent._handle_user_message,
+}
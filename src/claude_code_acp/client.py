@@ -7,13 +7,48 @@ Provides a simple, decorator-based API for interacting with Claude.
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
+import logging
+from dataclasses import dataclass, field
 from typing import Any, Callable, Coroutine
 
+from acp.schema import (
+    AgentMessageChunk,
+    AgentThoughtChunk,
+    ToolCallProgress,
+    ToolCallStart,
+)
+
 from .agent import ClaudeAcpAgent
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class ResultInfo:
+    """Token usage and timing for a completed query.
+
+    Attribute access is the fast path; ``info["key"]`` and ``info.get``
+    keep older dict-style handlers working.
+    """
+
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+    total_cost_usd: float | None = None
+    duration_ms: float | None = None
+    duration_api_ms: float | None = None
+    num_turns: int | None = None
+    is_error: bool = False
+    result: Any = None
+    usage: dict = field(default_factory=dict)
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
 
-@dataclass
+@dataclass(slots=True)
 class ClaudeEvents:
     """Event handlers for Claude responses."""
 
@@ -24,7 +59,7 @@ class ClaudeEvents:
     on_permission: Callable[[str, dict], Coroutine[Any, Any, bool]] | None = None
     on_error: Callable[[Exception], Coroutine[Any, Any, None]] | None = None
     on_complete: Callable[[], Coroutine[Any, Any, None]] | None = None
-    on_result: Callable[[dict], Coroutine[Any, Any, None]] | None = None
+    on_result: Callable[[ResultInfo], Coroutine[Any, Any, None]] | None = None
 
 
 class ClaudeClient:
@@ -51,7 +86,23 @@ class ClaudeClient:
         ```
     """
 
-    def __init__(self, cwd: str = ".", mcp_servers: list | None = None, system_prompt: str | dict | None = None):
+    __slots__ = (
+        "cwd",
+        "mcp_servers",
+        "system_prompt",
+        "coalesce_ms",
+        "agent",
+        "session_id",
+        "events",
+        "_text_parts",
+        "_text_len",
+        "input_tokens",
+        "output_tokens",
+        "total_cost_usd",
+        "_event_handler",
+    )
+
+    def __init__(self, cwd: str = ".", mcp_servers: list | None = None, system_prompt: str | dict | None = None, coalesce_ms: float = 0):
         """
         Initialize the Claude client.
 
@@ -61,19 +112,29 @@ class ClaudeClient:
             system_prompt: Custom system prompt for Claude. Can be:
                 - str: Plain text system prompt
                 - dict: {"type": "preset", "preset": "claude_code", "append": "..."}
+            coalesce_ms: When > 0, adjacent text deltas are combined for
+                up to this many milliseconds before on_text fires, trading
+                a little latency for far fewer callback invocations.
         """
         self.cwd = cwd
         self.mcp_servers = mcp_servers or []
         self.system_prompt = system_prompt
+        self.coalesce_ms = coalesce_ms
         self.agent = ClaudeAcpAgent()
         self.session_id: str | None = None
         self.events = ClaudeEvents()
-        self._text_buffer = ""
-        self._seen_text = set()  # Track seen text to avoid duplicates
+        # Response text accumulates as a list of chunks; joining once at
+        # the end of query() avoids quadratic str concatenation
+        self._text_parts: list[str] = []
+        self._text_len = 0
         # Token usage from the last query
         self.input_tokens: int | None = None
         self.output_tokens: int | None = None
         self.total_cost_usd: float | None = None
+        # Event handler shim, built lazily and reused across queries;
+        # registering a callback invalidates it so the snapshot stays fresh
+        self._event_handler: _EventHandler | None = None
+        self.agent._on_result = self._handle_result
 
     # --- Decorator-based event registration ---
 
@@ -89,6 +150,7 @@ class ClaudeClient:
                 print(text, end="", flush=True)
         """
         self.events.on_text = func
+        self._event_handler = None
         return func
 
     def on_thinking(self, func: Callable[[str], Coroutine[Any, Any, None]]):
@@ -101,6 +163,7 @@ class ClaudeClient:
                 print(f"[Thinking: {text}]")
         """
         self.events.on_thinking = func
+        self._event_handler = None
         return func
 
     def on_tool_start(
@@ -120,6 +183,7 @@ class ClaudeClient:
                 print(f"🔧 Starting: {name}")
         """
         self.events.on_tool_start = func
+        self._event_handler = None
         return func
 
     def on_tool_end(self, func: Callable[[str, str, Any], Coroutine[Any, Any, None]]):
@@ -138,6 +202,7 @@ class ClaudeClient:
                 print(f" {icon}")
         """
         self.events.on_tool_end = func
+        self._event_handler = None
         return func
 
     def on_permission(
@@ -155,6 +220,7 @@ class ClaudeClient:
                 return response.lower() == "y"
         """
         self.events.on_permission = func
+        self._event_handler = None
         return func
 
     def on_error(self, func: Callable[[Exception], Coroutine[Any, Any, None]]):
@@ -167,6 +233,7 @@ class ClaudeClient:
                 print(f"Error: {e}")
         """
         self.events.on_error = func
+        self._event_handler = None
         return func
 
     def on_complete(self, func: Callable[[], Coroutine[Any, Any, None]]):
@@ -179,13 +246,14 @@ class ClaudeClient:
                 print("\\n--- Done ---")
         """
         self.events.on_complete = func
+        self._event_handler = None
         return func
 
-    def on_result(self, func: Callable[[dict], Coroutine[Any, Any, None]]):
+    def on_result(self, func: Callable[[ResultInfo], Coroutine[Any, Any, None]]):
         """
         Register handler for result/usage info.
 
-        The handler receives a dict with keys like:
+        The handler receives a ResultInfo with fields like:
         - input_tokens, output_tokens (from usage)
         - total_cost_usd
         - duration_ms, duration_api_ms
@@ -197,6 +265,7 @@ class ClaudeClient:
                 print(f"Tokens: {info.get('input_tokens')}/{info.get('output_tokens')}")
         """
         self.events.on_result = func
+        self._event_handler = None
         return func
 
     # --- Lifecycle ---
@@ -241,41 +310,15 @@ class ClaudeClient:
         if not self.session_id:
             await self.start_session()
 
-        self._text_buffer = ""
-        self._seen_text = set()
-        self.input_tokens = None
-        self.output_tokens = None
-        self.total_cost_usd = None
+        self._reset_query_state()
 
-        # Wire up the event handler
-        self.agent._conn = self._create_event_handler()
-
-        # Wire up result callback for token usage
-        async def _handle_result(result_msg):
-            usage = result_msg.usage or {}
-            # 計算完整的 input tokens（含快取）
-            self.input_tokens = (
-                usage.get("input_tokens", 0)
-                + usage.get("cache_creation_input_tokens", 0)
-                + usage.get("cache_read_input_tokens", 0)
-            )
-            self.output_tokens = usage.get("output_tokens")
-            self.total_cost_usd = result_msg.total_cost_usd
-            if self.events.on_result:
-                info = {
-                    "input_tokens": self.input_tokens,
-                    "output_tokens": self.output_tokens,
-                    "total_cost_usd": self.total_cost_usd,
-                    "duration_ms": result_msg.duration_ms,
-                    "duration_api_ms": result_msg.duration_api_ms,
-                    "num_turns": result_msg.num_turns,
-                    "is_error": result_msg.is_error,
-                    "result": result_msg.result,
-                    "usage": usage,
-                }
-                await self.events.on_result(info)
-
-        self.agent._on_result = _handle_result
+        # Wire up the event handler (reused until callbacks change)
+        handler = self._event_handler
+        if handler is None:
+            handler = _EventHandler(self)
+            self._event_handler = handler
+        if self.agent._conn is not handler:
+            self.agent._conn = handler
 
         try:
             await self.agent.prompt(
@@ -283,15 +326,20 @@ class ClaudeClient:
                 session_id=self.session_id,
             )
 
-            if self.events.on_complete:
-                await self.events.on_complete()
+            # Deliver any coalesced text before signalling completion
+            await handler.flush_text()
+
+            on_complete = self.events.on_complete
+            if on_complete is not None:
+                await on_complete()
 
         except Exception as e:
-            if self.events.on_error:
-                await self.events.on_error(e)
+            on_error = self.events.on_error
+            if on_error is not None:
+                await on_error(e)
             raise
 
-        return self._text_buffer
+        return "".join(self._text_parts)
 
     async def set_mode(self, mode: str) -> None:
         """
@@ -314,86 +362,230 @@ class ClaudeClient:
             session_id=self.session_id,
         )
 
+    def _reset_query_state(self) -> None:
+        """Clear per-query accumulation and usage state."""
+        self._text_parts = []
+        self._text_len = 0
+        self.input_tokens = None
+        self.output_tokens = None
+        self.total_cost_usd = None
+
+    async def _handle_result(self, result_msg) -> None:
+        """Record token usage from a result message and notify on_result."""
+        usage = result_msg.usage or {}
+        get = usage.get
+        # 計算完整的 input tokens（含快取）
+        self.input_tokens = (
+            get("input_tokens", 0)
+            + get("cache_creation_input_tokens", 0)
+            + get("cache_read_input_tokens", 0)
+        )
+        self.output_tokens = get("output_tokens")
+        self.total_cost_usd = result_msg.total_cost_usd
+        if self.events.on_result:
+            info = ResultInfo(
+                input_tokens=self.input_tokens,
+                output_tokens=self.output_tokens,
+                total_cost_usd=self.total_cost_usd,
+                duration_ms=result_msg.duration_ms,
+                duration_api_ms=result_msg.duration_api_ms,
+                num_turns=result_msg.num_turns,
+                is_error=result_msg.is_error,
+                result=result_msg.result,
+                usage=usage,
+            )
+            await self.events.on_result(info)
+
     def _create_event_handler(self):
         """Create the internal event handler that bridges to user callbacks."""
-        client = self
-
-        class EventHandler:
-            async def session_update(self, session_id: str, update: Any) -> None:
-                update_type = type(update).__name__
-                import logging
-                logging.getLogger(__name__).debug(f"session_update: {update_type}")
-
-                if "AgentMessageChunk" in update_type:
-                    content = getattr(update, "content", None)
-                    if content and hasattr(content, "text"):
-                        text = content.text
-                        if not text:
-                            return
-
-                        # Smart deduplication for streaming:
-                        # - If text == buffer, exact duplicate, skip
-                        # - If text extends buffer (cumulative), emit only new part
-                        # - Otherwise, this is a new delta chunk, append and emit
-                        current_len = len(client._text_buffer)
-
-                        if current_len == 0:
-                            # First chunk
-                            client._text_buffer = text
-                            if client.events.on_text:
-                                await client.events.on_text(text)
-                        elif text == client._text_buffer:
-                            # Exact duplicate, skip
-                            pass
-                        elif text.startswith(client._text_buffer):
-                            # Cumulative update - text extends buffer, emit only new part
-                            new_part = text[current_len:]
-                            if new_part:
-                                client._text_buffer = text
-                                if client.events.on_text:
-                                    await client.events.on_text(new_part)
-                        else:
-                            # New delta chunk - append to buffer
-                            client._text_buffer += text
-                            if client.events.on_text:
-                                await client.events.on_text(text)
-
-                elif "AgentThoughtChunk" in update_type:
-                    content = getattr(update, "content", None)
-                    if content and hasattr(content, "text"):
-                        if client.events.on_thinking:
-                            await client.events.on_thinking(content.text)
-
-                elif "ToolCallStart" in update_type:
-                    if client.events.on_tool_start:
-                        await client.events.on_tool_start(
-                            getattr(update, "tool_call_id", ""),
-                            getattr(update, "title", ""),
-                            getattr(update, "raw_input", {}),
-                        )
-
-                elif "ToolCallProgress" in update_type:
-                    if client.events.on_tool_end:
-                        await client.events.on_tool_end(
-                            getattr(update, "tool_call_id", ""),
-                            getattr(update, "status", ""),
-                            getattr(update, "raw_output", None),
-                        )
-
-            async def request_permission(self, **kwargs: Any) -> dict:
-                tool_call = kwargs.get("tool_call", {})
-                name = tool_call.get("title", "Unknown")
-                raw_input = tool_call.get("raw_input", {})
-
-                approved = True
-                if client.events.on_permission:
-                    approved = await client.events.on_permission(name, raw_input)
-
-                if approved:
-                    return {"outcome": {"outcome": "selected", "option_id": "allow"}}
-                return {"outcome": {"outcome": "selected", "option_id": "reject"}}
-
-        return EventHandler()
-
-
-__all__ = ["ClaudeClient", "ClaudeEvents"]
+        handler = _EventHandler(self)
+        self._event_handler = handler
+        return handler
+
+
+class _EventHandler:
+    """Internal ACP connection shim that forwards updates to user callbacks.
+
+    Defined at module scope so query() only allocates a small instance
+    instead of rebuilding the class object on every call. The user
+    callbacks are snapshotted at construction, turning the per-chunk
+    events-dataclass traversal into a single slot load.
+    """
+
+    __slots__ = (
+        "_client",
+        "_dispatch",
+        "_on_text",
+        "_on_thinking",
+        "_on_tool_start",
+        "_on_tool_end",
+        "_on_permission",
+        "_coalesce",
+        "_pending_emit",
+        "_flush_handle",
+    )
+
+    def __init__(self, client: ClaudeClient) -> None:
+        self._client = client
+        events = client.events
+        self._on_text = events.on_text
+        self._on_thinking = events.on_thinking
+        self._on_tool_start = events.on_tool_start
+        self._on_tool_end = events.on_tool_end
+        self._on_permission = events.on_permission
+        # Only route update types someone is listening to; message chunks
+        # always flow because query() returns the accumulated text
+        dispatch = {AgentMessageChunk: _EventHandler._handle_message_chunk}
+        if self._on_thinking:
+            dispatch[AgentThoughtChunk] = _EventHandler._handle_thought_chunk
+        if self._on_tool_start:
+            dispatch[ToolCallStart] = _EventHandler._handle_tool_start
+        if self._on_tool_end:
+            dispatch[ToolCallProgress] = _EventHandler._handle_tool_end
+        self._dispatch = dispatch
+        # Optional delta coalescing (see ClaudeClient coalesce_ms)
+        self._coalesce = client.coalesce_ms / 1000
+        self._pending_emit: list[str] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    async def session_update(self, session_id: str, update: Any) -> None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("session_update: %s", type(update).__name__)
+
+        handler = self._dispatch.get(type(update))
+        if handler is not None:
+            await handler(self, update)
+
+    async def _handle_message_chunk(self, update: Any) -> None:
+        client = self._client
+        on_text = self._on_text
+        content = getattr(update, "content", None)
+        if content and hasattr(content, "text"):
+            text = content.text
+            if not text:
+                return
+
+            # Smart deduplication for streaming:
+            # - If text == buffer, exact duplicate, skip
+            # - If text extends buffer (cumulative), emit only new part
+            # - Otherwise, this is a new delta chunk, append and emit
+            # Compare lengths first: a chunk shorter than the buffer can
+            # be neither a duplicate nor a cumulative extension, so the
+            # common delta path is a plain list append; the buffer is
+            # only joined when an equal-or-longer chunk forces a compare
+            parts = client._text_parts
+            current_len = client._text_len
+            text_len = len(text)
+
+            if current_len == 0:
+                # First chunk
+                parts.append(text)
+                client._text_len = text_len
+                if on_text:
+                    await self._emit_text(text)
+            elif text_len < current_len:
+                # New delta chunk - append to buffer
+                parts.append(text)
+                client._text_len = current_len + text_len
+                if on_text:
+                    await self._emit_text(text)
+            else:
+                # Collapse so the compare (and any later ones) is cheap
+                buffer = "".join(parts)
+                parts[:] = [buffer]
+                if text is buffer or text == buffer:
+                    # Exact duplicate, skip (identity hit when the same
+                    # str object is re-delivered)
+                    pass
+                elif text_len > current_len and text.startswith(buffer):
+                    # Cumulative update - text extends buffer, emit only new part
+                    new_part = text[current_len:]
+                    parts[:] = [text]
+                    client._text_len = text_len
+                    if on_text:
+                        await self._emit_text(new_part)
+                else:
+                    # New delta chunk - append to buffer
+                    parts.append(text)
+                    client._text_len = current_len + text_len
+                    if on_text:
+                        await self._emit_text(text)
+
+    async def _emit_text(self, text: str) -> None:
+        """Deliver text to on_text, coalescing adjacent deltas if enabled."""
+        if self._coalesce <= 0:
+            await self._on_text(text)
+            return
+        self._pending_emit.append(text)
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self._coalesce, self._flush_soon)
+
+    def _flush_soon(self) -> None:
+        """Timer callback: flush coalesced text from a fresh task."""
+        self._flush_handle = None
+        asyncio.ensure_future(self.flush_text())
+
+    async def flush_text(self) -> None:
+        """Emit any coalesced text immediately, preserving event order."""
+        handle = self._flush_handle
+        if handle is not None:
+            handle.cancel()
+            self._flush_handle = None
+        pending = self._pending_emit
+        if pending:
+            combined = "".join(pending)
+            pending.clear()
+            await self._on_text(combined)
+
+    async def _handle_thought_chunk(self, update: Any) -> None:
+        if self._pending_emit:
+            await self.flush_text()
+        on_thinking = self._on_thinking
+        content = getattr(update, "content", None)
+        if content and hasattr(content, "text"):
+            if on_thinking:
+                await on_thinking(content.text)
+
+    async def _handle_tool_start(self, update: Any) -> None:
+        if self._pending_emit:
+            await self.flush_text()
+        on_tool_start = self._on_tool_start
+        if on_tool_start:
+            # ToolCallStart always carries these fields; direct access
+            # skips the getattr default machinery
+            raw_input = update.raw_input
+            title = update.title
+            await on_tool_start(
+                update.tool_call_id,
+                title if title is not None else "",
+                raw_input if raw_input is not None else {},
+            )
+
+    async def _handle_tool_end(self, update: Any) -> None:
+        if self._pending_emit:
+            await self.flush_text()
+        on_tool_end = self._on_tool_end
+        if on_tool_end:
+            status = update.status
+            await on_tool_end(
+                update.tool_call_id,
+                status if status is not None else "",
+                update.raw_output,
+            )
+
+    async def request_permission(self, **kwargs: Any) -> dict:
+        tool_call = kwargs.get("tool_call", {})
+        name = tool_call.get("title", "Unknown")
+        raw_input = tool_call.get("raw_input", {})
+
+        approved = True
+        if self._on_permission:
+            approved = await self._on_permission(name, raw_input)
+
+        if approved:
+            return {"outcome": {"outcome": "selected", "option_id": "allow"}}
+        return {"outcome": {"outcome": "selected", "option_id": "reject"}}
+
+
+__all__ = ["ClaudeClient", "ClaudeEvents", "ResultInfo"]
@@ -16,6 +16,11 @@ import logging
 import os
 import sys
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 from .server import run_proxy_server
 
 
@@ -142,6 +147,10 @@ Environment Variables:
         sys.exit(1)
 
     # Run the proxy server
+    # uvloop moves the event loop into libuv/C, cutting per-message
+    # overhead on the framed stdio stream (optional, POSIX only)
+    if uvloop is not None:
+        uvloop.install()
     try:
         asyncio.run(
             run_proxy_server(
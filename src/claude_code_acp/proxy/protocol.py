@@ -5,7 +5,11 @@ This module defines the JSON-RPC methods and data structures
 expected by the Copilot SDK.
 """
 
+import itertools
+import secrets
+import time
 from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from typing import Any, Literal
 from enum import Enum
 
@@ -211,16 +215,43 @@ class UserInputResponse:
 # Helper Functions
 # ============================================================================
 
+# Event IDs only need to be unique per process; a random prefix plus a
+# counter avoids the urandom read and UUID formatting per event
+_id_counter = itertools.count()
+_id_prefix = secrets.token_hex(4)
+
+# ISO timestamp cached per millisecond: delta events arrive far faster
+# than the clock tick that is visible in the formatted string
+_last_ts_ms = -1
+_last_ts_iso = ""
+
+
+def _now_iso() -> str:
+    global _last_ts_ms, _last_ts_iso
+    now_ns = time.time_ns()
+    ms = now_ns // 1_000_000
+    if ms != _last_ts_ms:
+        _last_ts_ms = ms
+        _last_ts_iso = datetime.fromtimestamp(now_ns / 1e9, timezone.utc).isoformat()
+    return _last_ts_iso
+
+
+# Copying a pre-sized template is faster than building the literal anew
+_EVENT_TEMPLATE = {"id": "", "type": "", "timestamp": "", "data": None}
+
+# Enum member -> value strings, resolved once; plain strings pass through
+# because str-enum members hash and compare equal to their values
+_TYPE_STR = {t: t.value for t in SessionEventType}
+
+
 def create_session_event(event_type: SessionEventType | str, data: dict | None = None) -> dict:
     """Create a session event notification payload."""
-    import uuid
-    from datetime import datetime, timezone
-    return {
-        "id": str(uuid.uuid4()),  # SDK requires event ID
-        "type": event_type.value if isinstance(event_type, SessionEventType) else event_type,
-        "timestamp": datetime.now(timezone.utc).isoformat(),  # ISO 8601 timestamp
-        "data": data or {}
-    }
+    event = _EVENT_TEMPLATE.copy()
+    event["id"] = f"{_id_prefix}-{next(_id_counter):x}"  # SDK requires event ID
+    event["type"] = _TYPE_STR.get(event_type, event_type)
+    event["timestamp"] = _now_iso()  # ISO 8601 timestamp
+    event["data"] = data or {}
+    return event
 
 
 def create_assistant_message_event(content: str, message_id: str = "") -> dict:
@@ -116,32 +116,37 @@ class AcpProxyServer:
         """Process incoming JSON-RPC messages with LSP-style Content-Length framing."""
         while self._running:
             try:
-                # Read Content-Length header
+                # Read Content-Length header; parse on bytes to skip a
+                # decode of the full line on the hot path
                 header_line = await self._input_stream.readline()
                 if not header_line:
                     # EOF
                     break
 
-                header = header_line.decode("utf-8").strip()
-                if not header:
+                header_line = header_line.strip()
+                if not header_line:
                     continue
 
                 # Parse Content-Length
-                if not header.startswith("Content-Length:"):
-                    logger.warning(f"Expected Content-Length header, got: {header}")
+                if not header_line.startswith(b"Content-Length:"):
+                    logger.warning(f"Expected Content-Length header, got: {header_line!r}")
                     continue
 
                 try:
-                    content_length = int(header.split(":")[1].strip())
-                except (IndexError, ValueError) as e:
-                    logger.error(f"Invalid Content-Length: {header}")
+                    content_length = int(header_line[15:])
+                except ValueError:
+                    logger.error(f"Invalid Content-Length: {header_line!r}")
                     continue
 
                 # Read empty line (CRLF separator)
                 await self._input_stream.readline()
 
-                # Read exact content
-                content_bytes = await self._read_exact(content_length)
+                # readexactly waits for the full body in one call instead
+                # of accumulating read() chunks
+                try:
+                    content_bytes = await self._input_stream.readexactly(content_length)
+                except asyncio.IncompleteReadError:
+                    raise EOFError("Unexpected end of stream")
                 content = content_bytes.decode("utf-8")
 
                 # Parse JSON-RPC message
@@ -160,18 +165,6 @@ class AcpProxyServer:
             except Exception as e:
                 logger.exception(f"Error processing message: {e}")
 
-    async def _read_exact(self, num_bytes: int) -> bytes:
-        """Read exactly num_bytes from the input stream."""
-        chunks = []
-        remaining = num_bytes
-        while remaining > 0:
-            chunk = await self._input_stream.read(remaining)
-            if not chunk:
-                raise EOFError("Unexpected end of stream")
-            chunks.append(chunk)
-            remaining -= len(chunk)
-        return b"".join(chunks)
-
     async def _handle_message(self, message: dict) -> None:
         """Handle a JSON-RPC message."""
         # Check if it's a request or notification
@@ -273,8 +266,9 @@ class AcpProxyServer:
         content_bytes = content.encode("utf-8")
         header = f"Content-Length: {len(content_bytes)}\r\n\r\n"
 
-        self._output_stream.write(header.encode("utf-8"))
-        self._output_stream.write(content_bytes)
+        # writelines hands both frame parts to the transport in one call
+        # instead of two separate write() invocations
+        self._output_stream.writelines((header.encode("utf-8"), content_bytes))
         await self._output_stream.drain()
         logger.debug(f"Sent: {message.get('method', message.get('id', 'response'))}")
 
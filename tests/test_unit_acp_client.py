@@ -2,7 +2,7 @@
 
 import pytest
 
-from claude_code_acp.acp_client import AcpClient, AcpClientEvents
+from claude_code_acp.acp_client import AcpClient, AcpClientEvents, AcpClientPool
 
 
 class TestAcpClientEvents:
@@ -201,8 +201,39 @@ class TestAcpClient:
         assert client._process is None
         assert client._connection is None
         assert client._session_id is None
-        assert client._text_buffer == ""
+        assert client._text_chunks == []
         assert client._initialized is False
         assert client._pending_model is None
         assert client._terminals == {}
         assert client._terminal_counter == 0
+
+    def test_event_dispatch_state_initialization(self):
+        """Test event dispatch state is properly initialized."""
+        client = AcpClient()
+
+        assert client._event_pool_size == 1
+        assert client._event_queue.empty()
+        assert client._dispatch_tasks == []
+
+
+class TestAcpClientPool:
+    """Tests for AcpClientPool."""
+
+    def test_pool_initialization(self):
+        """Test pool starts empty with client kwargs stored."""
+        pool = AcpClientPool(max_size=2, command="my-agent")
+
+        assert pool._idle.empty()
+        assert pool._client_kwargs == {"command": "my-agent"}
+
+    async def test_acquire_release_keeps_client_warm(self):
+        """Test released clients are reused instead of respawned."""
+        pool = AcpClientPool(max_size=1)
+        client = AcpClient()
+        client._session_id = "old-session"
+
+        await pool.release(client)
+        assert client._session_id is None
+
+        reused = await pool.acquire()
+        assert reused is client
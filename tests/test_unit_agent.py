@@ -16,7 +16,6 @@ class TestSession:
         assert session.cwd == "/tmp"
         assert session.permission_mode == "default"
         assert session.cancelled is False
-        assert session.tool_use_cache == {}
         assert session.mcp_servers == {}
         assert session.system_prompt is None
         assert session.model is None